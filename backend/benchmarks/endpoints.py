@@ -0,0 +1,481 @@
+"""
+Drive every /api/v1 route at several dataset sizes and report latency
+percentiles and throughput per route.
+
+    uv run python -m benchmarks.endpoints --sizes 1000 100000 1000000 \\
+        --concurrency 8 --output bench.json
+
+Requests go through Flask's test client in-process (``--transport
+inprocess``, the default) or over HTTP to a threaded server started on a
+free port (``--transport http``). Pass ``--url`` to benchmark a server you
+started yourself, such as gunicorn or uvicorn, pointed at the same
+BENCH_DATABASE_URL.
+
+Pass ``--baseline`` with the JSON of an earlier run to compare: a route
+whose p95 grew, or whose throughput fell, by more than ``--tolerance`` is
+flagged and the command exits with status 1.
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+SQLite serialises writers, so use Postgres for concurrency above 1.
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+from flask import Flask
+from sqlalchemy import func, select
+from werkzeug.serving import make_server
+
+from flaskr import bulk, create_app
+from flaskr.models import Question, db
+
+from .quiz_sampler import CATEGORIES, seed
+
+PAGE_SIZE = 10
+BATCH_IDS = 10
+BULK_IMPORT_ROWS = 100
+# Export streams a whole category and difficulty, so it runs fewer times.
+EXPORT_SHARE = 20
+
+
+@dataclass
+class Call:
+    method: str
+    path: str
+    body: Optional[object] = None
+
+
+class State:
+    """What the scenarios of one dataset size draw from."""
+
+    def __init__(self, app: Flask, size: int, seed_value: int):
+        self.app = app
+        self.size = size
+        self.rng = random.Random(seed_value)
+        self._lock = threading.Lock()
+        # Rows the write scenarios may change or delete, and live quiz sessions.
+        self.spare_ids: deque[int] = deque()
+        self.sessions: deque[str] = deque()
+
+    def randint(self, low: int, high: int) -> int:
+        with self._lock:
+            return self.rng.randint(low, high)
+
+    def sample(self, population: range, k: int) -> list[int]:
+        with self._lock:
+            return self.rng.sample(population, min(k, len(population)))
+
+    def add_spare_rows(self, count: int) -> None:
+        rows = (
+            {
+                "question": f"Spare question {i}?",
+                "answer": f"Spare answer {i}",
+                "category": i % CATEGORIES + 1,
+                "difficulty": i % 5 + 1,
+            }
+            for i in range(count)
+        )
+        with self.app.app_context():
+            first = db.session.scalar(select(func.coalesce(func.max(Question.id), 0))) + 1
+            db.session.remove()
+            with db.engine.begin() as connection:
+                for chunk in bulk.chunked(rows, 10_000):
+                    bulk.insert_rows(connection, chunk)
+            self.spare_ids.extend(
+                db.session.scalars(
+                    select(Question.id).where(Question.id >= first).order_by(Question.id)
+                )
+            )
+            db.session.remove()
+
+    def spare_id(self) -> int:
+        return self.spare_ids.popleft()
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[State], Call]
+    prepare: Optional[Callable[["Transport", State, int], None]] = None
+    share: int = 1
+
+    def requests(self, total: int) -> int:
+        return max(1, total // self.share)
+
+
+def _spare_rows(count_per_request: int) -> Callable:
+    def prepare(_transport, state: State, requests: int) -> None:
+        state.add_spare_rows(requests * count_per_request)
+
+    return prepare
+
+
+def _quiz_sessions(transport, state: State, requests: int) -> None:
+    for _ in range(requests):
+        _status, body = transport.request(
+            Call("POST", "/api/v1/quizzes/sessions", {"quiz_category": 0})
+        )
+        state.sessions.append(json.loads(body)["session_token"])
+
+
+def _deep_page(state: State) -> int:
+    return state.randint(1, max(1, state.size // PAGE_SIZE))
+
+
+def _category(state: State) -> int:
+    return state.randint(1, CATEGORIES)
+
+
+def _question_body(state: State) -> dict:
+    n = state.randint(0, 1_000_000)
+    return {
+        "question": f"Benchmark question {n}?",
+        "answer": f"Benchmark answer {n}",
+        "category": _category(state),
+        "difficulty": state.randint(1, 5),
+    }
+
+
+SCENARIOS = [
+    Scenario("categories", lambda s: Call("GET", "/api/v1/categories")),
+    Scenario("questions_first_page", lambda s: Call("GET", "/api/v1/questions")),
+    Scenario(
+        "questions_deep_page",
+        lambda s: Call("GET", f"/api/v1/questions?page={_deep_page(s)}"),
+    ),
+    Scenario("questions_cursor", lambda s: Call("GET", "/api/v1/questions?cursor=")),
+    Scenario(
+        "category_questions",
+        lambda s: Call("GET", f"/api/v1/categories/{_category(s)}/questions"),
+    ),
+    Scenario("stats", lambda s: Call("GET", "/api/v1/stats")),
+    Scenario(
+        "search",
+        lambda s: Call(
+            "POST",
+            "/api/v1/questions/search",
+            {"searchTerm": f"Question {s.randint(0, max(0, s.size - 1))}?"},
+        ),
+    ),
+    Scenario(
+        "export",
+        lambda s: Call(
+            "GET",
+            f"/api/v1/questions/export?category={_category(s)}&difficulty={s.randint(1, 5)}",
+        ),
+        share=EXPORT_SHARE,
+    ),
+    Scenario(
+        "quiz",
+        lambda s: Call(
+            "POST",
+            "/api/v1/quizzes",
+            {
+                "quiz_category": _category(s),
+                "previous_questions": s.sample(range(1, s.size + 1), 20),
+            },
+        ),
+    ),
+    Scenario(
+        "quiz_session_create",
+        lambda s: Call("POST", "/api/v1/quizzes/sessions", {"quiz_category": _category(s)}),
+    ),
+    Scenario(
+        "quiz_session_next",
+        lambda s: Call("POST", f"/api/v1/quizzes/sessions/{s.sessions[0]}/next"),
+        prepare=lambda t, s, n: _quiz_sessions(t, s, 1),
+    ),
+    Scenario(
+        "quiz_session_delete",
+        lambda s: Call("DELETE", f"/api/v1/quizzes/sessions/{s.sessions.popleft()}"),
+        prepare=_quiz_sessions,
+    ),
+    Scenario("question_create", lambda s: Call("POST", "/api/v1/questions", _question_body(s))),
+    Scenario(
+        "question_update",
+        lambda s: Call(
+            "PUT",
+            f"/api/v1/questions/{s.spare_id()}",
+            {"difficulty": s.randint(1, 5)},
+        ),
+        prepare=_spare_rows(1),
+    ),
+    Scenario(
+        "questions_batch_update",
+        lambda s: Call(
+            "PATCH",
+            "/api/v1/questions",
+            {
+                "ids": [s.spare_id() for _ in range(BATCH_IDS)],
+                "changes": {"difficulty": s.randint(1, 5)},
+            },
+        ),
+        prepare=_spare_rows(BATCH_IDS),
+    ),
+    Scenario(
+        "question_delete",
+        lambda s: Call("DELETE", f"/api/v1/questions/{s.spare_id()}"),
+        prepare=_spare_rows(1),
+    ),
+    Scenario(
+        "questions_batch_delete",
+        lambda s: Call(
+            "DELETE",
+            "/api/v1/questions",
+            {"ids": [s.spare_id() for _ in range(BATCH_IDS)]},
+        ),
+        prepare=_spare_rows(BATCH_IDS),
+    ),
+    Scenario(
+        "questions_bulk_import",
+        lambda s: Call(
+            "POST",
+            "/api/v1/questions/bulk",
+            [_question_body(s) for _ in range(BULK_IMPORT_ROWS)],
+        ),
+        share=10,
+    ),
+]
+
+
+class Transport:
+    name = ""
+
+    def request(self, call: Call) -> tuple[int, bytes]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class InProcessTransport(Transport):
+    """Flask's test client, one per worker thread."""
+
+    name = "inprocess"
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, call: Call) -> tuple[int, bytes]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(call.path, method=call.method, json=call.body)
+        try:
+            return response.status_code, response.get_data()
+        finally:
+            response.close()
+
+
+class HttpTransport(Transport):
+    """One keep-alive connection per worker thread."""
+
+    name = "http"
+
+    def __init__(self, base_url: str, server=None):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.server = server
+        self._local = threading.local()
+
+    @classmethod
+    def serve(cls, app: Flask) -> "HttpTransport":
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return cls(f"http://127.0.0.1:{server.server_port}", server)
+
+    def request(self, call: Call) -> tuple[int, bytes]:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port)
+        body = None if call.body is None else json.dumps(call.body)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            connection.request(call.method, call.path, body=body, headers=headers)
+            response = connection.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # The server closed the connection; open a new one once.
+            connection.close()
+            connection.request(call.method, call.path, body=body, headers=headers)
+            response = connection.getresponse()
+        return response.status, response.read()
+
+    def close(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def run_scenario(
+    transport: Transport, state: State, scenario: Scenario, requests: int, concurrency: int
+) -> dict:
+    if scenario.prepare is not None:
+        scenario.prepare(transport, state, requests)
+    calls = [scenario.build(state) for _ in range(requests)]
+
+    def send(call: Call) -> tuple[float, int]:
+        start = time.perf_counter()
+        status, _body = transport.request(call)
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(send, calls))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds * 1000 for seconds, _status in outcomes)
+    return {
+        "requests": requests,
+        "errors": sum(1 for _seconds, status in outcomes if status >= 400),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "rps": round(requests / elapsed, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list[str]:
+    """Regressions of ``results`` against ``baseline``, as printable lines."""
+    regressions = []
+    for size, scenarios in results["results"].items():
+        for name, current in scenarios.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            p95_delta = current["p95_ms"] - before["p95_ms"]
+            if p95_delta > min_delta_ms and current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{size:>9} {name}: p95 {before['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms"
+                )
+            if current["rps"] < before["rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{size:>9} {name}: throughput {before['rps']:.1f} -> {current['rps']:.1f} req/s"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--transport", choices=("inprocess", "http"), default="inprocess")
+    parser.add_argument("--url", help="benchmark this server instead of starting one")
+    parser.add_argument("--routes", nargs="+", help="only run these scenarios")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for request parameters")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed relative p95/throughput regression"
+    )
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=0.5, help="ignore p95 changes smaller than this"
+    )
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.routes or s.name in args.routes]
+    unknown = set(args.routes or ()) - {s.name for s in scenarios}
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+
+    database_url = os.getenv("BENCH_DATABASE_URL")
+    if database_url is None:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+    config = {"SQLALCHEMY_DATABASE_URI": database_url}
+
+    seed_app = create_app(config)
+    with seed_app.app_context():
+        dialect = db.engine.dialect.name
+    transport_name = "http" if args.url else args.transport
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "database": dialect,
+            "transport": transport_name,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "python": platform.python_version(),
+        },
+        "results": {},
+    }
+
+    print(
+        f"{'questions':>9} {'route':<24} {'p50 ms':>8} {'p95 ms':>8}"
+        f" {'p99 ms':>8} {'req/s':>8} {'errors':>6}"
+    )
+    for size in args.sizes:
+        with seed_app.app_context():
+            seed(size)
+            db.session.remove()
+        # A fresh app per size, so caches and indexes start from the new data.
+        app = create_app(config)
+        if args.url:
+            transport: Transport = HttpTransport(args.url)
+        elif args.transport == "http":
+            transport = HttpTransport.serve(app)
+        else:
+            transport = InProcessTransport(app)
+
+        state = State(app, size, args.seed)
+        by_route = results["results"][str(size)] = {}
+        try:
+            for scenario in scenarios:
+                stats = run_scenario(
+                    transport, state, scenario, scenario.requests(args.requests), args.concurrency
+                )
+                by_route[scenario.name] = stats
+                print(
+                    f"{size:>9} {scenario.name:<24} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f}"
+                    f" {stats['p99_ms']:>8.2f} {stats['rps']:>8.1f} {stats['errors']:>6}"
+                )
+        finally:
+            transport.close()
+            with app.app_context():
+                db.engine.dispose()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            print("\n".join(regressions))
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
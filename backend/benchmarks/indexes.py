@@ -0,0 +1,156 @@
+"""
+Latency of the category-filtered routes before and after migration 2 adds
+the (category, id) and (category, difficulty) indexes, on a dataset where
+categories are unevenly sized.
+
+    BENCH_DATABASE_URL=postgresql:///trivia_bench uv run python -m benchmarks.indexes --size 1000000
+
+The indexes are built online, as the migration builds them, while a writer
+keeps inserting questions; the slowest of those inserts is reported next to
+the build time.
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import insert, text
+
+from flaskr import create_app
+from flaskr import synthetic
+from flaskr.migrations import create_index
+from flaskr.models import Question, db
+
+# From most to least common; the last category holds 0.1% of the questions.
+CATEGORY_WEIGHTS = (40, 30, 20, 8, 1.9, 0.1)
+
+
+def routes(common: int, rare: int) -> dict[str, tuple[str, str, Optional[dict]]]:
+    return {
+        "category page (common)": ("GET", f"/api/v1/categories/{common}/questions", None),
+        "category page (rare)": ("GET", f"/api/v1/categories/{rare}/questions", None),
+        "quiz (common)": ("POST", "/api/v1/quizzes", {"quiz_category": common}),
+        "quiz (rare)": ("POST", "/api/v1/quizzes", {"quiz_category": rare}),
+        "export (rare, difficulty 3)": (
+            "GET",
+            f"/api/v1/questions/export?category={rare}&difficulty=3",
+            None,
+        ),
+    }
+
+
+def timed(client, method: str, path: str, body, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+        samples.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {path} answered {response.status_code}")
+    return statistics.median(samples) * 1000
+
+
+def measure(app, calls: dict, repeat: int) -> dict[str, float]:
+    client = app.test_client()
+    return {name: timed(client, *call, repeat) for name, call in calls.items()}
+
+
+def build_online(app) -> tuple[float, float]:
+    """Build the indexes while inserting; returns build seconds and the slowest insert."""
+    stop = threading.Event()
+    slowest = [0.0]
+
+    def write() -> None:
+        with app.app_context():
+            while not stop.is_set():
+                start = time.perf_counter()
+                with db.engine.begin() as connection:
+                    connection.execute(
+                        insert(Question),
+                        {
+                            "question": "Written during the build?",
+                            "answer": "Yes",
+                            "category": 1,
+                            "difficulty": 1,
+                        },
+                    )
+                slowest[0] = max(slowest[0], time.perf_counter() - start)
+                time.sleep(0.01)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    start = time.perf_counter()
+    try:
+        with app.app_context(), db.engine.connect() as connection:
+            connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+            for index in Question.__table__.indexes:
+                columns = ", ".join(column.name for column in index.columns)
+                create_index(connection, index.name, Question.__tablename__, columns)
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("ANALYZE questions"))
+        return time.perf_counter() - start, slowest[0]
+    finally:
+        stop.set()
+        writer.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    database_url = os.getenv("BENCH_DATABASE_URL")
+    if database_url is None:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+    # The benchmark decides when the indexes exist, not app startup.
+    config = {
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "STARTUP_OPTIONS": {"schema_check": "skip"},
+    }
+
+    app = create_app(config)
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        # Start from a database made before migration 2.
+        for index in Question.__table__.indexes:
+            index.drop(db.engine)
+        spec = synthetic.DatasetSpec(category_weights=CATEGORY_WEIGHTS)
+        inserted, seconds = synthetic.load(db.engine, spec, args.size, args.seed)
+        category_ids = synthetic.ensure_categories(db.engine, spec.categories)
+        if db.engine.dialect.name == "postgresql":
+            with db.engine.connect() as connection:
+                connection.execution_options(isolation_level="AUTOCOMMIT").execute(
+                    text("VACUUM ANALYZE questions")
+                )
+    print(f"Seeded {inserted} questions in {seconds:.1f}s.")
+
+    calls = routes(category_ids[0], category_ids[-1])
+    # A fresh app for each pass, so no cache carries over.
+    before = measure(create_app(config), calls, args.repeat)
+    build_seconds, slowest_write = build_online(app)
+    after = measure(create_app(config), calls, args.repeat)
+
+    print(
+        f"Built indexes in {build_seconds:.1f}s;"
+        f" slowest concurrent insert {slowest_write * 1000:.1f} ms."
+    )
+    print(f"{'route':<28} {'before ms':>10} {'after ms':>9}")
+    for name in calls:
+        print(f"{name:<28} {before[name]:>10.2f} {after[name]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
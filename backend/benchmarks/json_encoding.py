@@ -0,0 +1,86 @@
+"""
+Compare the legacy list-response path (load Question instances, build a dict
+per row, stdlib jsonify) with column rows handed to each JSON provider.
+
+    uv run python -m benchmarks.json_encoding --sizes 10 100 1000
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from flaskr import create_app
+from flaskr.models import Question, db
+from flaskr.reads import QUESTION_COLUMNS
+from flaskr.serialization import OrjsonProvider, StdlibJSONProvider, orjson
+
+from .quiz_sampler import seed
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+        db.session.expunge_all()
+    return statistics.median(samples) * 1000
+
+
+def legacy(app, limit: int):
+    questions = Question.query.order_by(Question.id).limit(limit).all()
+    payload = {
+        "questions": [
+            {
+                "id": q.id,
+                "question": q.question,
+                "answer": q.answer,
+                "category": q.category,
+                "difficulty": q.difficulty,
+            }
+            for q in questions
+        ]
+    }
+    return DefaultJSONProvider(app).response(payload)
+
+
+def rows(provider, limit: int):
+    questions = db.session.query(*QUESTION_COLUMNS).order_by(Question.id).limit(limit).all()
+    return provider.response({"questions": questions})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    database_url = os.getenv("BENCH_DATABASE_URL")
+    if database_url is None:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_url})
+    providers = {"stdlib rows": StdlibJSONProvider(app)}
+    if orjson is not None:
+        providers["orjson rows"] = OrjsonProvider(app)
+
+    print(f"{'rows':>6} {'legacy ms':>10}" + "".join(f" {name:>12}" for name in providers))
+    with app.test_request_context():
+        seed(max(args.sizes))
+        for size in args.sizes:
+            line = f"{size:>6} {timed(lambda: legacy(app, size), args.repeat):>10.3f}"
+            for provider in providers.values():
+                line += f" {timed(lambda: rows(provider, size), args.repeat):>12.3f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
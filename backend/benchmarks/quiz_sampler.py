@@ -0,0 +1,112 @@
+"""
+Compare the legacy quiz query (load every candidate, random.choice) with
+QuestionSampler as the question bank grows, and fetching a quiz's questions
+one call at a time with fetching them in one ``sample_many`` batch.
+
+    uv run python -m benchmarks.quiz_sampler --sizes 1000 10000 100000 --batch 5
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import insert
+
+from flaskr import bulk, create_app
+from flaskr.models import Category, Question, db
+from flaskr.sampling import QuestionSampler
+
+CATEGORIES = 6
+SEED_CHUNK_SIZE = 10_000
+
+
+def seed(total: int) -> None:
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    rows = (
+        {
+            "question": f"Question {i}?",
+            "answer": f"Answer {i}",
+            "category": i % CATEGORIES + 1,
+            "difficulty": i % 5 + 1,
+        }
+        for i in range(total)
+    )
+    with db.engine.begin() as connection:
+        connection.execute(
+            insert(Category),
+            [{"id": i, "type": f"Category {i}"} for i in range(1, CATEGORIES + 1)],
+        )
+        for chunk in bulk.chunked(rows, SEED_CHUNK_SIZE):
+            bulk.insert_rows(connection, chunk)
+
+
+def legacy(category_id: int, exclude: list[int]):
+    query = Question.query.filter(Question.category == category_id)
+    if exclude:
+        query = query.filter(~Question.id.in_(exclude))
+    available = query.all()
+    return random.choice(available) if available else None
+
+
+def one_at_a_time(sampler: QuestionSampler, count: int, exclude: list[int]) -> None:
+    seen = list(exclude)
+    for _ in range(count):
+        question = sampler.sample(1, exclude=seen)
+        if question is not None:
+            seen.append(question.id)
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+        db.session.expunge_all()
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=25)
+    parser.add_argument("--batch", type=int, default=5)
+    args = parser.parse_args()
+
+    database_url = os.getenv("BENCH_DATABASE_URL")
+    if database_url is None:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_url})
+    exclude = list(range(1, 50))
+
+    batch = args.batch
+    print(
+        f"{'questions':>10} {'legacy ms':>10} {'sampler ms':>11}"
+        f" {f'{batch} calls ms':>13} {f'batch of {batch} ms':>15}"
+    )
+    with app.app_context():
+        for size in args.sizes:
+            seed(size)
+            sampler = QuestionSampler(db.session)
+            legacy_ms = timed(lambda: legacy(1, exclude), args.repeat)
+            sampler_ms = timed(lambda: sampler.sample(1, exclude=exclude), args.repeat)
+            calls_ms = timed(lambda: one_at_a_time(sampler, batch, exclude), args.repeat)
+            batch_ms = timed(lambda: sampler.sample_many(1, batch, exclude=exclude), args.repeat)
+            print(
+                f"{size:>10} {legacy_ms:>10.2f} {sampler_ms:>11.2f}"
+                f" {calls_ms:>13.2f} {batch_ms:>15.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
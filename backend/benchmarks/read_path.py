@@ -0,0 +1,81 @@
+"""
+Compare loading a page of Question instances with the column-projection read
+path (QuestionRecord), by latency and by peak memory allocated per page.
+
+    uv run python -m benchmarks.read_path --sizes 10 100 1000
+
+Runs against a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from flaskr import create_app
+from flaskr.models import Question, db
+from flaskr.reads import fetch_all, select_questions
+
+from .quiz_sampler import seed
+
+
+def orm_page(limit: int):
+    return [q.format() for q in Question.query.order_by(Question.id).limit(limit).all()]
+
+
+def record_page(limit: int):
+    return fetch_all(db.session, select_questions().order_by(Question.id).limit(limit))
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+        db.session.remove()
+    return statistics.median(samples) * 1000
+
+
+def peak_kib(fn) -> float:
+    fn()
+    db.session.remove()
+    tracemalloc.start()
+    fn()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.remove()
+    return peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    database_url = os.getenv("BENCH_DATABASE_URL")
+    if database_url is None:
+        handle, path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        database_url = f"sqlite:///{path}"
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_url})
+
+    print(f"{'rows':>6} {'orm ms':>8} {'records ms':>11} {'orm KiB':>9} {'records KiB':>12}")
+    with app.app_context():
+        seed(max(args.sizes))
+        for size in args.sizes:
+            print(
+                f"{size:>6}"
+                f" {timed(lambda: orm_page(size), args.repeat):>8.3f}"
+                f" {timed(lambda: record_page(size), args.repeat):>11.3f}"
+                f" {peak_kib(lambda: orm_page(size)):>9.1f}"
+                f" {peak_kib(lambda: record_page(size)):>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
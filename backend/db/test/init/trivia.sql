@@ -1,4 +1,6 @@
 -- Trivia schema + seed data (cleaned)
+-- Base tables only: the app adds the other tables, triggers and indexes
+-- with its migrations (flask --app flaskr migrate).
 
 BEGIN;
 
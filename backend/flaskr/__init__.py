@@ -1,40 +1,141 @@
+import json
 import random
+from functools import partial
 from typing import Optional, cast
 
+import click
 from flask import Flask, Request, Response, abort, jsonify, request, Blueprint
 from flask.typing import ResponseReturnValue
 from flask_cors import CORS
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.exceptions import HTTPException
 
+from . import bulk, counters, migrations, synthetic
+from .admission import CHEAP, EXPENSIVE, admit, cost, init_admission
+from .categories import EXTENSION_KEY as CATEGORY_REGISTRY_KEY
+from .categories import CategoryRegistry
+from .compression import compress_responses, init_compression
+from .config import ProductionConfig
+from .conditional import EXTENSION_KEY as DATA_VERSIONS_KEY
+from .conditional import DataVersions, conditional
 from .models import (
-    Category,
     Question,
     QuestionCreationValidation,
     ValidationError,
     db,
     setup_db,
 )
+from .pagination import (
+    DEFAULT_SORT,
+    CursorError,
+    after,
+    decode_cursor,
+    order_by,
+    split_page,
+)
+from .metrics import (
+    admission_samples,
+    compression_samples,
+    init_metrics,
+    instrument,
+    pool_samples,
+    startup_samples,
+)
+from .pooling import pool_stats
+from .querylog import init_query_log, query_budget, watch
+from .quiz_sessions import QuizSessionStore
+from .reads import fetch_all, select_questions
+from .replicas import EXTENSION_KEY as REPLICA_ROUTER_KEY
+from .replicas import DEFAULT_REPLICA_POLICY, read_engine, read_only
+from .sampling import QuestionSampler
+from .search import create_search_backend
+from .serialization import init_json
+from .startup import EXTENSION_KEY as STARTUP_KEY
+from .startup import (
+    SCHEMA_CREATE,
+    StartupTimer,
+    ensure_schema,
+    prewarm_caches,
+    prewarm_pool,
+)
 
 QUESTIONS_PER_PAGE = 10
+MAX_PAGE_SIZE = 100
+QUIZ_SESSION_TTL_SECONDS = 30 * 60
+QUIZ_BATCH_MAX = 50
+BULK_IMPORT_MAX_ITEMS = 50_000
+UPDATABLE_FIELDS = {"question", "answer", "category", "difficulty"}
+FIELD_VALIDATORS = {
+    "question": QuestionCreationValidation.validate_question,
+    "answer": QuestionCreationValidation.validate_answer,
+    "category": QuestionCreationValidation.validate_category,
+    "difficulty": QuestionCreationValidation.validate_difficulty,
+}
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", bulk.ndjson_lines),
+    "csv": ("text/csv", bulk.csv_lines),
+}
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
 
 
 def create_app(test_config: Optional[dict] = None):
+    timer = StartupTimer()
     app = Flask(__name__)
+    app.extensions[STARTUP_KEY] = timer
 
-    if test_config is None:
-        setup_db(app)
-    else:
-        database_path = test_config.get("SQLALCHEMY_DATABASE_URI")
-        setup_db(app, database_path=database_path)
+    with timer.phase("config"):
+        # The environment is read once; everything below uses this dict.
+        if test_config is None:
+            config = ProductionConfig(testing=False).as_app_config()
+        else:
+            config = test_config
+    startup_options = config.get("STARTUP_OPTIONS", {})
+
+    init_json(app, config.get("JSON_BACKEND"))
+    setup_db(
+        app,
+        database_path=config.get("SQLALCHEMY_DATABASE_URI"),
+        engine_options=config.get("SQLALCHEMY_ENGINE_OPTIONS"),
+        replica_paths=config.get("SQLALCHEMY_REPLICA_URIS", ()),
+        replica_policy=config.get("REPLICA_POLICY", DEFAULT_REPLICA_POLICY),
+    )
+    init_query_log(app, **config.get("QUERY_LOG_OPTIONS", {}))
+    admission = init_admission(app, **config.get("ADMISSION_OPTIONS", {}))
+    compressor = init_compression(app, **config.get("COMPRESSION_OPTIONS", {}))
 
     # Enable CORS for all origins.
     CORS(app, resources={r"/*": {"origins": "*"}})
 
-    with app.app_context():
-        db.create_all()
-    
+    with app.app_context(), timer.phase("schema"):
+        ensure_schema(startup_options.get("schema_check", SCHEMA_CREATE))
+        search_backend = create_search_backend(db.engine)
+
+    category_registry = CategoryRegistry()
+    app.extensions[CATEGORY_REGISTRY_KEY] = category_registry
+    app.extensions[DATA_VERSIONS_KEY] = DataVersions()
+
+    def pools() -> list[tuple[str, dict]]:
+        router = app.extensions[REPLICA_ROUTER_KEY]
+        return [("primary", pool_stats(db.engine))] + [
+            (replica.name, pool_stats(replica.engine)) for replica in router.replicas
+        ]
+
+    init_metrics(
+        app,
+        collectors=[
+            lambda: pool_samples(pools()),
+            lambda: admission_samples(admission.stats()),
+            lambda: compression_samples(compressor.stats()),
+            lambda: startup_samples(timer.phases),
+        ],
+    )
+
     api = Blueprint("api", __name__, url_prefix="/api/v1")
+    instrument(api)
+    watch(api)
+    admit(api)
+    compress_responses(api)
+    quiz_sessions = QuizSessionStore(ttl_seconds=QUIZ_SESSION_TTL_SECONDS)
 
     """
     Helpers
@@ -52,6 +153,107 @@ def create_app(test_config: Optional[dict] = None):
         offset = (page - 1) * PAGE_SIZE
         return page, PAGE_SIZE, offset
 
+    def get_page_size(request: Request, default: int = QUESTIONS_PER_PAGE) -> int:
+        try:
+            limit = int(request.args.get("limit", default))
+        except ValueError:
+            abort(400, description="limit must be an integer")
+
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            abort(400, description=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        return limit
+
+    def get_keyset(request: Request) -> Optional[tuple[str, Optional[tuple]]]:
+        """Return (sort, values) when the request uses cursor paging, else None.
+
+        An empty ``cursor`` asks for the first page in cursor mode.
+        """
+        if "cursor" not in request.args:
+            return None
+        if "page" in request.args:
+            abort(400, description="page and cursor cannot be combined")
+
+        token = request.args.get("cursor", "")
+        if not token:
+            return DEFAULT_SORT, None
+        try:
+            return decode_cursor(token)
+        except CursorError as e:
+            abort(400, description=str(e))
+
+    def page_query(query, keyset: Optional[tuple], page_size: int):
+        """Order and window ``query`` for page or cursor mode.
+
+        One extra row is fetched so ``split_page`` can tell whether a next
+        page exists.
+        """
+        sort = DEFAULT_SORT if keyset is None else keyset[0]
+        query = query.order_by(*order_by(sort))
+        if keyset is None:
+            _page, _page_size, offset = get_pagination(request, page_size)
+            query = query.offset(offset)
+        elif keyset[1] is not None:
+            query = query.filter(after(*keyset))
+        return query.limit(page_size + 1), sort
+
+    def parse_bulk_body(request: Request) -> list:
+        """Return the items of a JSON array or NDJSON body.
+
+        Unparseable NDJSON lines are returned as the exception, so the caller
+        can report them by position.
+        """
+        if request.mimetype in NDJSON_MIMETYPES:
+            items: list = []
+            for line in request.get_data(as_text=True).splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    items.append(json.loads(line))
+                except ValueError as e:
+                    items.append(e)
+            return items
+
+        body = request.get_json(silent=True)
+        if not isinstance(body, list):
+            abort(400, description="Request body must be a JSON array or NDJSON.")
+        return body
+
+    def parse_id_list(ids) -> list[int]:
+        if (
+            not isinstance(ids, list)
+            or not ids
+            or any(not isinstance(i, int) or isinstance(i, bool) or i < 1 for i in ids)
+        ):
+            abort(400, description="ids must be a non-empty list of positive integers.")
+        if len(ids) > BULK_IMPORT_MAX_ITEMS:
+            abort(413, description=f"At most {BULK_IMPORT_MAX_ITEMS} ids per request.")
+        return ids
+
+    def parse_question_filter(question_filter) -> list:
+        if not isinstance(question_filter, dict) or not question_filter:
+            abort(400, description="filter must be a non-empty object.")
+        unknown = set(question_filter) - {"category", "difficulty"}
+        if unknown:
+            abort(400, description=f"Unknown filter fields: {', '.join(sorted(unknown))}.")
+
+        conditions = []
+        if "category" in question_filter:
+            conditions.append(
+                Question.category
+                == QuestionCreationValidation.validate_category(question_filter["category"])
+            )
+        if "difficulty" in question_filter:
+            conditions.append(
+                Question.difficulty
+                == QuestionCreationValidation.validate_difficulty(question_filter["difficulty"])
+            )
+        return conditions
+
+    def invalidate_after_bulk_write() -> None:
+        # Core statements bypass the ORM events these caches listen to.
+        search_backend.invalidate()
+        app.extensions[DATA_VERSIONS_KEY].invalidate()
+
     def validate_category_id(category_id: int) -> int:
         if not isinstance(category_id, int) or category_id < 1:
             abort(400, description="category_id must be a positive integer")
@@ -64,6 +266,35 @@ def create_app(test_config: Optional[dict] = None):
             abort(400, description="question_id must be a positive integer")
         return question_id
 
+    def parse_quiz_category(body: dict) -> int:
+        quiz_category: Optional[dict] = body.get("quiz_category", None)
+        if isinstance(quiz_category, dict):
+            if "id" not in quiz_category:
+                abort(400, description="quiz_category must include an 'id' field.")
+            category_id_raw = quiz_category.get("id")
+        elif isinstance(quiz_category, (str, int)):
+            category_id_raw: Optional[int] = quiz_category
+
+        else:
+            abort(400, description="quiz_category must be a category id or object.")
+
+        try:
+            return int(category_id_raw) if category_id_raw is not None else 0
+        except (TypeError, ValueError):
+            abort(
+                400,
+                description="quiz_category must be a category id (string/int) or '0' for All.",
+            )
+
+    def ensure_quiz_category(category_id: int) -> None:
+        if category_id == 0:
+            return
+        try:
+            if not category_registry.exists(category_id):
+                abort(404, description=f"Category with id {category_id} not found.")
+        except SQLAlchemyError:
+            abort(500, description="Database error while validating category.")
+
     @api.after_request
     def after_request(response: Response) -> Response:
         response.headers.add(
@@ -80,16 +311,16 @@ def create_app(test_config: Optional[dict] = None):
     """
 
     @api.route("/categories", methods=["GET"])
+    @cost(CHEAP)
+    @read_only
+    @query_budget(2)
+    @conditional(tables=("categories",), cache_control="public, max-age=60")
     def get_categories():
         try:
-            categories: list[Category] = (
-                db.session.query(Category).order_by(Category.id).all()
-            )
+            categories_dict: dict[int, str] = category_registry.all()
         except SQLAlchemyError:
             abort(500, description="Database error while fetching categories.")
 
-        categories_dict: dict[int, str] = {c.id: c.type for c in categories}
-
         return jsonify({"success": True, "categories": categories_dict})
 
     """
@@ -105,39 +336,58 @@ def create_app(test_config: Optional[dict] = None):
     """
 
     @api.route("/questions", methods=["GET"])
+    @read_only
+    @query_budget(4)
+    @conditional()
     def get_questions():
-        page, page_size, offset = get_pagination(request, QUESTIONS_PER_PAGE)
+        keyset = get_keyset(request)
+        page_size = get_page_size(request)
+        query, sort = page_query(select_questions(), keyset, page_size)
 
         try:
-            questions: list[Question] = (
-                Question.query.order_by(Question.id)
-                .offset(offset)
-                .limit(page_size)
-                .all()
-            )
-            total_questions: int = Question.query.count()
-            categories: list[Category] = Category.query.order_by(Category.id).all()
+            questions = fetch_all(db.session, query)
+            total_questions: int = counters.total_questions(db.session)
+            categories_dict: dict[int, str] = category_registry.all()
         except SQLAlchemyError:
             abort(500, description="Database error while fetching questions.")
 
-        categories_dict: dict[int, str] = {c.id: c.type for c in categories}
+        questions, cursor = split_page(sort, questions, page_size)
 
         return jsonify(
             {
                 "success": True,
-                "questions": [
-                    {
-                        "id": q.id,
-                        "question": q.question,
-                        "answer": q.answer,
-                        "category": q.category,
-                        "difficulty": q.difficulty,
-                    }
-                    for q in questions
-                ],
+                "questions": questions,
                 "total_questions": total_questions,
                 "categories": categories_dict,
                 "current_category": None,
+                "pagination": "page" if keyset is None else "cursor",
+                "next_cursor": cursor,
+            }
+        )
+
+    """
+    Question counts, read from the trigger-maintained question_counts table.
+    """
+
+    @api.route("/stats", methods=["GET"])
+    @cost(CHEAP)
+    @read_only
+    @query_budget(1)
+    def get_stats():
+        try:
+            counts = counters.breakdown(db.session)
+        except SQLAlchemyError:
+            abort(500, description="Database error while fetching stats.")
+
+        return jsonify(
+            {
+                "success": True,
+                **counts,
+                "category_cache": category_registry.stats(),
+                "pool": pool_stats(db.engine),
+                "replicas": app.extensions[REPLICA_ROUTER_KEY].stats(),
+                "admission": admission.stats(),
+                "compression": compressor.stats(),
             }
         )
 
@@ -205,6 +455,174 @@ def create_app(test_config: Optional[dict] = None):
             db.session.rollback()
             abort(500, description="Unable to add question, database error.")
 
+    """
+    Bulk import: a JSON array or NDJSON stream of questions, validated as a
+    batch and loaded in chunked transactions. Invalid items are reported
+    with their position and do not stop the rest of the batch.
+    """
+
+    @api.route("/questions/bulk", methods=["POST"])
+    @cost(EXPENSIVE)
+    def bulk_add_questions():
+        items = parse_bulk_body(request)
+        if len(items) > BULK_IMPORT_MAX_ITEMS:
+            abort(
+                413,
+                description=f"A bulk import may contain at most {BULK_IMPORT_MAX_ITEMS} questions.",
+            )
+
+        try:
+            category_registry.all()
+        except SQLAlchemyError:
+            abort(500, description="Database error while fetching categories.")
+
+        rows: list[tuple[int, dict]] = []
+        errors: list[dict] = []
+        for index, item in enumerate(items):
+            if isinstance(item, Exception):
+                errors.append({"index": index, "message": "Line is not valid JSON."})
+                continue
+            if not isinstance(item, dict):
+                errors.append({"index": index, "message": "Item must be a JSON object."})
+                continue
+            try:
+                data = QuestionCreationValidation(
+                    question=item.get("question"),
+                    answer=item.get("answer"),
+                    category=item.get("category"),
+                    difficulty=item.get("difficulty"),
+                )
+            except ValidationError as e:
+                errors.append({"index": index, "message": str(e)})
+                continue
+            rows.append(
+                (
+                    index,
+                    {
+                        "question": data.question,
+                        "answer": data.answer,
+                        "category": data.category,
+                        "difficulty": data.difficulty,
+                    },
+                )
+            )
+
+        created, load_errors = bulk.load(db.engine, rows)
+        if created:
+            invalidate_after_bulk_write()
+        errors = sorted(errors + load_errors, key=lambda e: e["index"])
+
+        return jsonify(
+            {
+                "success": True,
+                "created": created,
+                "failed": len(errors),
+                "errors": errors,
+            }
+        )
+
+    """
+    Export the question bank as a stream, optionally filtered by category
+    and difficulty. Rows are read over a server-side cursor in batches.
+    """
+
+    @api.route("/questions/export", methods=["GET"])
+    @cost(EXPENSIVE)
+    @read_only
+    @query_budget(1)
+    def export_questions():
+        export_format = request.args.get("format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            abort(400, description="format must be one of: ndjson, csv.")
+
+        question_filter = {
+            key: request.args[key] for key in ("category", "difficulty") if key in request.args
+        }
+        try:
+            conditions = parse_question_filter(question_filter) if question_filter else []
+        except ValidationError as e:
+            abort(422, description=str(e))
+
+        mimetype, encode = EXPORT_FORMATS[export_format]
+        if export_format == "ndjson":
+            encode = partial(encode, dumpb=app.json.dumpb)
+        engine = read_engine() or db.engine
+
+        def generate():
+            try:
+                yield from encode(bulk.export_rows(engine, conditions))
+            except SQLAlchemyError:
+                # The 200 is already sent. Re-raising makes the server drop
+                # the connection without the final chunk, so the client sees
+                # a failed download instead of a complete-looking short file.
+                app.logger.exception("Question export aborted by a database error.")
+                raise
+
+        return Response(
+            generate(),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": f"attachment; filename=questions.{export_format}"
+            },
+        )
+
+    """
+    Batch delete and update. Each chunk of ids (or of rows matching a filter)
+    is one SQL statement in its own transaction.
+    """
+
+    @api.route("/questions", methods=["DELETE"])
+    @cost(EXPENSIVE)
+    def batch_delete_questions():
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            abort(400, description="Request does not contain a valid JSON body.")
+        if ("ids" in body) == ("filter" in body):
+            abort(400, description="Provide exactly one of ids or filter.")
+
+        try:
+            if "ids" in body:
+                deleted = bulk.delete_ids(db.engine, parse_id_list(body.get("ids")))
+            else:
+                deleted = bulk.delete_where(db.engine, parse_question_filter(body.get("filter")))
+        except ValidationError as e:
+            abort(422, description=str(e))
+        except SQLAlchemyError:
+            abort(500, description="Unable to delete questions, database error.")
+
+        if deleted:
+            invalidate_after_bulk_write()
+        return jsonify({"success": True, "deleted": deleted})
+
+    @api.route("/questions", methods=["PATCH"])
+    @cost(EXPENSIVE)
+    def batch_update_questions():
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            abort(400, description="Request does not contain a valid JSON body.")
+
+        ids = parse_id_list(body.get("ids"))
+        changes = body.get("changes")
+        if not isinstance(changes, dict) or not changes:
+            abort(400, description="changes must be a non-empty object.")
+        unknown = set(changes) - UPDATABLE_FIELDS
+        if unknown:
+            abort(400, description=f"Unknown fields in changes: {', '.join(sorted(unknown))}.")
+
+        try:
+            values = {
+                field: FIELD_VALIDATORS[field](value) for field, value in changes.items()
+            }
+            updated = bulk.update_ids(db.engine, ids, values)
+        except ValidationError as e:
+            abort(422, description=str(e))
+        except SQLAlchemyError:
+            abort(500, description="Unable to update questions, database error.")
+
+        if updated:
+            invalidate_after_bulk_write()
+        return jsonify({"success": True, "updated": updated})
+
     """
     Create a POST endpoint to get questions based on a search term.
     It should return any questions for whom the search term
@@ -216,6 +634,9 @@ def create_app(test_config: Optional[dict] = None):
     """
 
     @api.route("/questions/search", methods=["POST"])
+    @cost(EXPENSIVE)
+    @read_only
+    @query_budget(2)
     def search_questions():
         body = request.get_json(silent=True)
         if body is None:
@@ -229,11 +650,32 @@ def create_app(test_config: Optional[dict] = None):
         if not search_term:
             abort(400, description="searchTerm cannot be empty.")
 
+        search_answers = body.get("searchAnswers", False)
+        if not isinstance(search_answers, bool):
+            abort(400, description="searchAnswers must be a boolean.")
+
+        keyset = get_keyset(request)
+        page_size = get_page_size(request)
+        offset, after_id = 0, None
+        if keyset is None:
+            _page, _page_size, offset = get_pagination(request, page_size)
+        elif keyset[0] != DEFAULT_SORT:
+            abort(400, description="cursor is invalid")
+        else:
+            # Cursor pages follow id order; ranked order is only paged by number.
+            after_id = keyset[1][0] if keyset[1] is not None else 0
+
         try:
-            questions: list[Question] = (
-                db.session.query(Question)
-                .filter(Question.question.ilike(f"%{search_term}%"))
-                .all()
+            questions = search_backend.search(
+                db.session,
+                search_term,
+                include_answers=search_answers,
+                limit=page_size + 1,
+                offset=offset,
+                after_id=after_id,
+            )
+            total_questions = search_backend.count(
+                db.session, search_term, include_answers=search_answers
             )
         except SQLAlchemyError:
             abort(
@@ -241,12 +683,16 @@ def create_app(test_config: Optional[dict] = None):
                 description="Database error occurred while searching for questions.",
             )
 
+        questions, cursor = split_page(DEFAULT_SORT, questions, page_size)
+
         return jsonify(
             {
                 "success": True,
-                "questions": [q.format() for q in questions],
-                "total_questions": len(questions),
+                "questions": questions,
+                "total_questions": total_questions,
                 "current_category": None,
+                "pagination": "page" if keyset is None else "cursor",
+                "next_cursor": cursor,
             }
         )
 
@@ -259,30 +705,41 @@ def create_app(test_config: Optional[dict] = None):
     """
 
     @api.route("/categories/<int:category_id>/questions", methods=["GET"])
+    @read_only
+    @query_budget(4)
+    @conditional()
     def get_questions_by_category(category_id: int):
         cid = validate_category_id(category_id)
+        keyset = get_keyset(request)
+        page_size = get_page_size(request)
 
         try:
-            category = db.session.get(Category, cid)
+            category_exists = category_registry.exists(cid)
         except SQLAlchemyError:
             abort(500, description="Database error while fetching category.")
 
-        if not category:
+        if not category_exists:
             abort(404, description=f"Category with id {cid} not found.")
 
+        query, sort = page_query(
+            select_questions(Question.category == cid), keyset, page_size
+        )
         try:
-            questions: list[Question] = (
-                db.session.query(Question).filter_by(category=cid).all()
-            )
+            questions = fetch_all(db.session, query)
+            total_questions: int = counters.total_questions(db.session, category=cid)
         except SQLAlchemyError:
             abort(500, description="Database error while fetching category questions.")
 
+        questions, cursor = split_page(sort, questions, page_size)
+
         return jsonify(
             {
                 "success": True,
-                "questions": [q.format() for q in questions],
-                "total_questions": len(questions),
+                "questions": questions,
+                "total_questions": total_questions,
                 "current_category": cid,
+                "pagination": "page" if keyset is None else "cursor",
+                "next_cursor": cursor,
             }
         )
 
@@ -298,21 +755,15 @@ def create_app(test_config: Optional[dict] = None):
     """
 
     @api.route("/quizzes", methods=["POST"])
+    @cost(EXPENSIVE)
+    @read_only
+    @query_budget(6)
     def play_quiz():
         body = request.get_json(silent=True)
         if body is None:
             abort(400, description="Request does not contain a valid JSON body.")
 
-        quiz_category: Optional[dict] = body.get("quiz_category", None)
-        if isinstance(quiz_category, dict):
-            if "id" not in quiz_category:
-                abort(400, description="quiz_category must include an 'id' field.")
-            category_id_raw = quiz_category.get("id")
-        elif isinstance(quiz_category, (str, int)):
-            category_id_raw: Optional[int] = quiz_category
-
-        else:
-            abort(400, description="quiz_category must be a category id or object.")
+        category_id = parse_quiz_category(body)
 
         previous_questions = body.get("previous_questions", [])
         if not isinstance(previous_questions, list) or any(
@@ -320,37 +771,103 @@ def create_app(test_config: Optional[dict] = None):
         ):
             abort(400, description="previous_questions must be a list of integers.")
 
+        count = body.get("count")
+        if count is not None and (
+            not isinstance(count, int)
+            or isinstance(count, bool)
+            or not 1 <= count <= QUIZ_BATCH_MAX
+        ):
+            abort(400, description=f"count must be an integer between 1 and {QUIZ_BATCH_MAX}.")
+
+        seed = body.get("seed")
+        if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+            abort(400, description="seed must be an integer.")
+
+        ensure_quiz_category(category_id)
+
+        # The same seed, category and previous_questions give the same
+        # questions, as long as the questions table has not changed.
+        rng = random.Random(seed) if seed is not None else None
+        sampler = QuestionSampler(db.session, rng=rng)
         try:
-            category_id = int(category_id_raw) if category_id_raw is not None else 0
-        except (TypeError, ValueError):
-            abort(
-                400,
-                description="quiz_category must be a category id (string/int) or '0' for All.",
-            )
+            if count is not None:
+                questions = sampler.sample_many(category_id, count, exclude=previous_questions)
+            else:
+                question = sampler.sample(category_id, exclude=previous_questions)
+        except SQLAlchemyError:
+            abort(500, description="Database error while fetching quiz questions.")
 
-        query = Question.query
-        if category_id != 0:
-            try:
-                if not db.session.get(Category, category_id):
-                    abort(404, description=f"Category with id {category_id} not found.")
-            except SQLAlchemyError:
-                abort(500, description="Database error while validating category.")
+        if count is not None:
+            return jsonify({"questions": questions}), 200
 
-            query = query.filter(Question.category == category_id)
+        if question is None:
+            return jsonify({"question": None}), 200
 
-        if previous_questions:
-            query = query.filter(~Question.id.in_(previous_questions))
+        return jsonify({"question": question}), 200
+
+    """
+    Quiz sessions keep the seen-set on the server, so each "next question"
+    request has a constant size no matter how long the quiz runs.
+    """
+
+    @api.route("/quizzes/sessions", methods=["POST"])
+    @cost(EXPENSIVE)
+    def create_quiz_session():
+        body = request.get_json(silent=True)
+        if body is None:
+            abort(400, description="Request does not contain a valid JSON body.")
+
+        category_id = parse_quiz_category(body)
+        ensure_quiz_category(category_id)
 
         try:
-            available = query.all()
+            session = quiz_sessions.create(category_id)
+        except SQLAlchemyError:
+            abort(500, description="Database error while starting the quiz session.")
+        return jsonify(
+            {
+                "success": True,
+                "session_token": session.token,
+                "quiz_category": category_id,
+                "expires_in": QUIZ_SESSION_TTL_SECONDS,
+            }
+        )
+
+    @api.route("/quizzes/sessions/<string:token>/next", methods=["POST"])
+    @cost(EXPENSIVE)
+    @read_only
+    @query_budget(7)
+    def next_quiz_question(token: str):
+        try:
+            with quiz_sessions.checkout(token) as session:
+                if session is None:
+                    abort(404, description="Quiz session not found or expired.")
+                question = QuestionSampler(db.session).sample(
+                    session.category_id, exclude=session.seen
+                )
+                if question is not None:
+                    session.seen.add(question.id)
         except SQLAlchemyError:
             abort(500, description="Database error while fetching quiz questions.")
 
-        if not available:
-            return jsonify({"question": None}), 200
+        return jsonify(
+            {
+                "success": True,
+                "question": question,
+                "questions_seen": len(session.seen),
+            }
+        )
 
-        question = random.choice(available)
-        return jsonify({"question": question.format()}), 200
+    @api.route("/quizzes/sessions/<string:token>", methods=["DELETE"])
+    @cost(CHEAP)
+    def delete_quiz_session(token: str):
+        try:
+            deleted = quiz_sessions.discard(token)
+        except SQLAlchemyError:
+            abort(500, description="Database error while ending the quiz session.")
+        if not deleted:
+            abort(404, description="Quiz session not found or expired.")
+        return jsonify({"success": True, "deleted": token})
 
     """
     Create a PUT endpoint to update a question.
@@ -367,8 +884,7 @@ def create_app(test_config: Optional[dict] = None):
         if not question:
             abort(404, description=f"Question with id {qid} not found.")
 
-        updatable_fields = {"question", "answer", "category", "difficulty"}
-        if not any(field in body for field in updatable_fields):
+        if not any(field in body for field in UPDATABLE_FIELDS):
             abort(400, description="At least one updatable field is required.")
 
         try:
@@ -432,5 +948,142 @@ def create_app(test_config: Optional[dict] = None):
             }
         ), 500
 
+    @app.cli.command("reconcile-counts")
+    def reconcile_counts_command():
+        """Recompute question counters from the questions table."""
+        with db.engine.begin() as connection:
+            total = counters.reconcile(connection)
+        click.echo(f"Reconciled question counts: {total} questions.")
+
+    @app.cli.command("search-indexes")
+    def search_indexes_command():
+        """Build the pg_trgm search indexes, e.g. once the extension is available."""
+        if db.engine.dialect.name != "postgresql":
+            click.echo("Trigram indexes are only used on Postgres.")
+            return
+        with db.engine.connect() as connection:
+            built = migrations.create_trigram_indexes(
+                connection.execution_options(isolation_level="AUTOCOMMIT")
+            )
+        if not built:
+            raise click.ClickException("pg_trgm could not be installed.")
+        click.echo("Built the search indexes; restart the app to use them.")
+
+    @app.cli.command("migrate")
+    @click.option("--list", "list_only", is_flag=True, help="Show migrations without applying.")
+    def migrate_command(list_only: bool):
+        """Apply pending schema migrations."""
+        version = migrations.schema_version(db.engine)
+        if list_only:
+            for migration in migrations.MIGRATIONS:
+                state = "applied" if migration.version <= (version or 0) else "pending"
+                click.echo(f"{migration.version:>4}  {state:<8} {migration.description}")
+            return
+        applied = migrations.upgrade(db.engine)
+        if not applied:
+            click.echo(f"Schema is at version {migrations.SCHEMA_VERSION}; nothing to apply.")
+        for migration in applied:
+            click.echo(f"Applied {migration.version}: {migration.description}")
+
+    def parse_option(parse):
+        def callback(_ctx, param, value):
+            if value is None:
+                return None
+            try:
+                return parse(value)
+            except ValueError as e:
+                raise click.BadParameter(str(e), param=param)
+
+        return callback
+
+    def parse_weights(value: str) -> list[float]:
+        weights = [float(w) for w in value.split(",")]
+        if any(w < 0 for w in weights) or not any(weights):
+            raise ValueError("Weights must be non-negative and not all zero.")
+        return weights
+
+    @app.cli.command("generate-questions")
+    @click.option("--count", type=click.IntRange(min=1), required=True)
+    @click.option("--seed", type=int, default=0, show_default=True)
+    @click.option(
+        "--categories",
+        default=",".join(synthetic.DEFAULT_CATEGORIES),
+        show_default=True,
+        help="Comma-separated category names; missing ones are created.",
+    )
+    @click.option(
+        "--category-weights",
+        callback=parse_option(parse_weights),
+        help="Comma-separated relative weights, one per category (default: equal).",
+    )
+    @click.option(
+        "--difficulty-weights",
+        default=",".join(map(str, synthetic.DEFAULT_DIFFICULTY_WEIGHTS)),
+        show_default=True,
+        callback=parse_option(parse_weights),
+        help="Relative weights of difficulties 1 to 5.",
+    )
+    @click.option(
+        "--question-words",
+        default="8:3",
+        show_default=True,
+        callback=parse_option(lambda v: synthetic.LengthDistribution.parse(v, minimum=2)),
+        help="Question length in words, as MEAN or MEAN:STDDEV.",
+    )
+    @click.option(
+        "--answer-words",
+        default="2:1",
+        show_default=True,
+        callback=parse_option(synthetic.LengthDistribution.parse),
+        help="Answer length in words, as MEAN or MEAN:STDDEV.",
+    )
+    @click.option(
+        "--chunk-size",
+        type=click.IntRange(min=1),
+        default=synthetic.GENERATE_CHUNK_SIZE,
+        show_default=True,
+        help="Rows per COPY or INSERT, each in its own transaction.",
+    )
+    def generate_questions_command(
+        count: int,
+        seed: int,
+        categories: str,
+        category_weights: Optional[list[float]],
+        difficulty_weights: list[float],
+        question_words,
+        answer_words,
+        chunk_size: int,
+    ):
+        """Add COUNT synthetic questions, the same ones for the same seed."""
+        try:
+            spec = synthetic.DatasetSpec(
+                categories=[name.strip() for name in categories.split(",") if name.strip()],
+                category_weights=category_weights,
+                difficulty_weights=difficulty_weights,
+                question_words=question_words,
+                answer_words=answer_words,
+            )
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        inserted, seconds = synthetic.load(db.engine, spec, count, seed, chunk_size)
+        click.echo(
+            f"Generated {inserted} questions in {seconds:.1f}s "
+            f"({inserted / seconds:,.0f} rows/s)."
+        )
+
     app.register_blueprint(api)
+
+    connections = startup_options.get("pool_prewarm", 0)
+    if connections:
+        with app.app_context(), timer.phase("pool"):
+            prewarm_pool(db.engine, connections)
+            for replica in app.extensions[REPLICA_ROUTER_KEY].replicas:
+                prewarm_pool(replica.engine, connections)
+    if startup_options.get("prewarm_caches", False):
+        with timer.phase("caches"):
+            prewarm_caches(
+                app, search_backend if startup_options.get("prewarm_search") else None
+            )
+
+    timer.finish()
     return app
@@ -0,0 +1,213 @@
+"""
+Admission control for the API.
+
+Each route has a cost class. A class admits up to its limit of requests at
+once; the next ones wait in a bounded queue, first come first served, for
+at most ``queue_timeout_ms``. A request that finds the queue full, or is
+still waiting when the timeout passes, gets a 503 with Retry-After at once,
+instead of tying up a worker on a database that is already slow.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from functools import partial
+from typing import Callable, Optional, Union
+
+from flask import Blueprint, Flask, Response, current_app, g, jsonify, request
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+EXTENSION_KEY = "admission"
+
+CHEAP = "cheap"
+STANDARD = "standard"
+EXPENSIVE = "expensive"
+COST_CLASSES = (CHEAP, STANDARD, EXPENSIVE)
+
+REJECT_QUEUE_FULL = "queue_full"
+REJECT_TIMEOUT = "timeout"
+
+_SLOT = "admission_slot"
+
+
+class _Waiter:
+    """
+    One queued request. Under ASGI every request runs in a greenlet on the
+    event loop thread, so it waits on an asyncio event; blocking the thread
+    would stop the requests holding the slots as well.
+    """
+
+    def __init__(self):
+        self.granted = False
+        self.event: Union[asyncio.Event, threading.Event] = (
+            asyncio.Event() if in_greenlet() else threading.Event()
+        )
+
+    def wait(self, timeout: float) -> None:
+        if isinstance(self.event, threading.Event):
+            self.event.wait(timeout)
+            return
+        try:
+            await_only(asyncio.wait_for(self.event.wait(), timeout))
+        except asyncio.TimeoutError:
+            pass
+
+
+class CostClass:
+    """Concurrency limit and wait queue for one cost class. A limit of 0 admits everything."""
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = {REJECT_QUEUE_FULL: 0, REJECT_TIMEOUT: 0}
+        self._lock = threading.Lock()
+        self._waiters: deque[_Waiter] = deque()
+
+    def acquire(self, timeout: float) -> Optional[str]:
+        """Take a slot. Returns None when admitted, else the rejection reason."""
+        with self._lock:
+            if not self.limit or (self.in_flight < self.limit and not self._waiters):
+                self.in_flight += 1
+                self.admitted += 1
+                return None
+            if len(self._waiters) >= self.queue_size:
+                self.rejected[REJECT_QUEUE_FULL] += 1
+                return REJECT_QUEUE_FULL
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+            self.queued += 1
+
+        waiter.wait(timeout)
+        with self._lock:
+            # ``release`` may have handed over a slot just as the wait ended.
+            if waiter.granted:
+                self.admitted += 1
+                return None
+            self._waiters.remove(waiter)
+            self.rejected[REJECT_TIMEOUT] += 1
+            return REJECT_TIMEOUT
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                # The slot passes straight to the oldest waiter, so a request
+                # arriving now cannot take it first.
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.event.set()
+            else:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "waiting": len(self._waiters),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": dict(self.rejected),
+            }
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        limits: Optional[dict[str, int]] = None,
+        queue_size: int = 0,
+        queue_timeout_ms: int = 0,
+        retry_after: int = 1,
+    ):
+        limits = limits or {}
+        unknown = set(limits) - set(COST_CLASSES)
+        if unknown:
+            raise ValueError(f"Cost class must be one of: {', '.join(COST_CLASSES)}.")
+        self.classes = {
+            name: CostClass(name, limits.get(name, 0), queue_size) for name in COST_CLASSES
+        }
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.retry_after = retry_after
+
+    def acquire(self, cost_class: str) -> Optional[str]:
+        return self.classes[cost_class].acquire(self.queue_timeout)
+
+    def release(self, cost_class: str) -> None:
+        self.classes[cost_class].release()
+
+    def stats(self) -> dict:
+        return {name: cost_class.stats() for name, cost_class in self.classes.items()}
+
+
+def cost(cost_class: str) -> Callable:
+    """Put the view in ``cost_class`` instead of the standard class."""
+    if cost_class not in COST_CLASSES:
+        raise ValueError(f"Cost class must be one of: {', '.join(COST_CLASSES)}.")
+
+    def decorator(view: Callable) -> Callable:
+        view.admission_cost = cost_class
+        return view
+
+    return decorator
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    return current_app.extensions.get(EXTENSION_KEY)
+
+
+def admit(bp: Blueprint) -> None:
+    """Run every request to ``bp`` through the app's admission controller."""
+
+    @bp.before_request
+    def acquire_slot() -> Optional[Response]:
+        controller = get_admission_controller()
+        if controller is None:
+            return None
+        view = current_app.view_functions.get(request.endpoint)
+        cost_class = getattr(view, "admission_cost", STANDARD)
+        rejected = controller.acquire(cost_class)
+        if rejected is not None:
+            response = jsonify(
+                {
+                    "success": False,
+                    "error": 503,
+                    "message": "Server is busy; retry shortly.",
+                }
+            )
+            response.status_code = 503
+            response.headers["Retry-After"] = str(controller.retry_after)
+            return response
+        setattr(g, _SLOT, cost_class)
+        return None
+
+    @bp.after_request
+    def release_slot(response: Response) -> Response:
+        cost_class = g.pop(_SLOT, None)
+        controller = get_admission_controller()
+        if cost_class is None or controller is None:
+            return response
+        if response.is_streamed:
+            # The export reads rows while its body is sent, so it keeps the
+            # slot until the server closes the response.
+            response.call_on_close(partial(controller.release, cost_class))
+        else:
+            controller.release(cost_class)
+        return response
+
+    @bp.teardown_request
+    def release_on_error(_exc: Optional[BaseException]) -> None:
+        # Only still set when an exception skipped the after_request hooks.
+        cost_class = g.pop(_SLOT, None)
+        controller = get_admission_controller()
+        if cost_class is not None and controller is not None:
+            controller.release(cost_class)
+
+
+def init_admission(app: Flask, **options) -> AdmissionController:
+    controller = AdmissionController(**options)
+    app.extensions[EXTENSION_KEY] = controller
+    return controller
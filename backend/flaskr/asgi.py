@@ -0,0 +1,181 @@
+"""
+ASGI entry point.
+
+    uv run uvicorn flaskr.asgi:app
+
+Every request runs the regular Flask app, so the routes and JSON contracts
+are the ones ``flask run`` serves. The difference is the database driver:
+the app is built on asyncpg and each request runs in a greenlet, so a query
+suspends only its own request and hands the event loop to the next one. One
+worker can keep many list and quiz requests waiting on Postgres at once.
+"""
+
+import asyncio
+import sys
+from io import BytesIO
+from typing import Optional
+
+from flask import Flask
+from sqlalchemy.engine import make_url
+from sqlalchemy.util import greenlet_spawn
+
+from . import create_app
+from .config import ProductionConfig
+from .models import db
+from .replicas import EXTENSION_KEY as REPLICA_ROUTER_KEY
+
+ASYNC_DRIVER = "asyncpg"
+
+
+def async_database_uri(database_uri: str) -> str:
+    """Point a Postgres URI at the async driver."""
+    url = make_url(database_uri)
+    if url.get_backend_name() != "postgresql":
+        raise ValueError("ASGI mode requires a Postgres database.")
+    return url.set(drivername=f"postgresql+{ASYNC_DRIVER}").render_as_string(
+        hide_password=False
+    )
+
+
+def build_environ(scope: dict, body: bytes) -> dict:
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+class AsgiApp:
+    """
+    Serve a Flask app over ASGI with its database I/O on the event loop.
+
+    The Flask app is created on startup (the lifespan event, or the first
+    request), inside a greenlet, because creating it already queries the
+    database.
+    """
+
+    def __init__(self, test_config: Optional[dict] = None):
+        self.test_config = test_config
+        self.flask_app: Optional[Flask] = None
+        self._startup_lock: Optional[asyncio.Lock] = None
+
+    def _config(self) -> dict:
+        if self.test_config is not None:
+            return self.test_config
+        config = ProductionConfig(testing=False)
+        app_config = config.as_app_config()
+        database_uri = async_database_uri(app_config["SQLALCHEMY_DATABASE_URI"])
+        app_config.update(
+            SQLALCHEMY_DATABASE_URI=database_uri,
+            SQLALCHEMY_ENGINE_OPTIONS=config.engine_options(database_uri),
+            SQLALCHEMY_REPLICA_URIS=[
+                async_database_uri(url) for url in app_config["SQLALCHEMY_REPLICA_URIS"]
+            ],
+        )
+        return app_config
+
+    async def startup(self) -> Flask:
+        if self.flask_app is None:
+            if self._startup_lock is None:
+                self._startup_lock = asyncio.Lock()
+            async with self._startup_lock:
+                if self.flask_app is None:
+                    self.flask_app = await greenlet_spawn(create_app, self._config())
+        return self.flask_app
+
+    async def shutdown(self) -> None:
+        if self.flask_app is not None:
+            with self.flask_app.app_context():
+                await greenlet_spawn(db.engine.dispose)
+                await greenlet_spawn(self.flask_app.extensions[REPLICA_ROUTER_KEY].dispose)
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}.")
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    raise
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope: dict, receive, send) -> None:
+        app = await self.startup()
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        environ = build_environ(scope, bytes(body))
+        started: dict = {}
+
+        def start_response(status: str, headers: list, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in headers
+            ]
+            return lambda _data: None
+
+        iterable = await greenlet_spawn(app, environ, start_response)
+        try:
+            await send({"type": "http.response.start", **started})
+            # Streamed bodies (the export) query as they iterate, so each
+            # chunk is produced in a greenlet as well.
+            chunks = iter(iterable)
+            while True:
+                chunk = await greenlet_spawn(next, chunks, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                await greenlet_spawn(close)
+
+
+def create_asgi_app(test_config: Optional[dict] = None) -> AsgiApp:
+    return AsgiApp(test_config)
+
+
+app = create_asgi_app()
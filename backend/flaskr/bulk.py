@@ -0,0 +1,179 @@
+import csv
+import io
+import json
+import logging
+from typing import Callable, Iterable, Iterator, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Connection, Engine, Row
+from sqlalchemy.exc import SQLAlchemyError
+
+from .models import Question
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = 1000
+COLUMNS = ("question", "answer", "category", "difficulty")
+
+
+def _copy_rows(connection: Connection, rows: Sequence[dict]) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([row[c] for c in COLUMNS] for row in rows)
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {Question.__tablename__} ({', '.join(COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def insert_rows(connection: Connection, rows: Sequence[dict]) -> None:
+    """
+    Insert question rows in one round-trip where the driver allows it.
+
+    psycopg2 streams the rows with COPY; other drivers get a single
+    executemany, which SQLAlchemy turns into multi-row INSERTs.
+    """
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        _copy_rows(connection, rows)
+    else:
+        connection.execute(insert(Question.__table__), list(rows))
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load(
+    engine: Engine,
+    rows: Iterable[tuple[int, dict]],
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> tuple[int, list[dict]]:
+    """
+    Insert ``(index, row)`` pairs in chunks, one transaction per chunk.
+
+    A failing chunk is rolled back and reported item by item; the remaining
+    chunks still load. Returns the number of rows created and the errors.
+    """
+    created = 0
+    errors: list[dict] = []
+    for chunk in chunked(rows, chunk_size):
+        try:
+            with engine.begin() as connection:
+                insert_rows(connection, [row for _, row in chunk])
+        except (SQLAlchemyError, engine.dialect.dbapi.Error) as e:
+            logger.warning("Bulk insert chunk failed: %s", e.__class__.__name__)
+            errors.extend(
+                {"index": index, "message": "Database error while inserting question."}
+                for index, _ in chunk
+            )
+        else:
+            created += len(chunk)
+    return created, errors
+
+
+def delete_ids(engine: Engine, ids: Sequence[int], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """Delete questions by id, one statement and transaction per chunk."""
+    deleted = 0
+    table = Question.__table__
+    for chunk in chunked(sorted(set(ids)), chunk_size):
+        with engine.begin() as connection:
+            deleted += connection.execute(table.delete().where(table.c.id.in_(chunk))).rowcount
+    return deleted
+
+
+def delete_where(engine: Engine, conditions: list, chunk_size: int = BULK_CHUNK_SIZE) -> int:
+    """
+    Delete every question matching ``conditions``, ``chunk_size`` rows per
+    statement, so a large filter never holds locks on the whole set at once.
+    """
+    deleted = 0
+    table = Question.__table__
+    batch = (
+        select(table.c.id).where(*conditions).order_by(table.c.id).limit(chunk_size)
+    ).scalar_subquery()
+    while True:
+        with engine.begin() as connection:
+            count = connection.execute(table.delete().where(table.c.id.in_(batch))).rowcount
+        deleted += count
+        if count < chunk_size:
+            return deleted
+
+
+def update_ids(
+    engine: Engine,
+    ids: Sequence[int],
+    values: dict,
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> int:
+    """Apply the same ``values`` to questions by id, one statement per chunk."""
+    updated = 0
+    table = Question.__table__
+    for chunk in chunked(sorted(set(ids)), chunk_size):
+        with engine.begin() as connection:
+            updated += connection.execute(
+                table.update().where(table.c.id.in_(chunk)).values(**values)
+            ).rowcount
+    return updated
+
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ("id", *COLUMNS)
+
+
+def export_rows(
+    engine: Engine, conditions: list, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[Sequence[tuple]]:
+    """
+    Yield batches of question rows over a server-side cursor, so memory use
+    stays at one batch however large the table is.
+    """
+    table = Question.__table__
+    stmt = (
+        select(*(table.c[name] for name in EXPORT_COLUMNS))
+        .where(*conditions)
+        .order_by(table.c.id)
+    )
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(stmt)
+        for partition in result.partitions():
+            yield partition
+
+
+def _dumpb(row: Row) -> bytes:
+    return json.dumps(row._asdict(), ensure_ascii=False).encode()
+
+
+def ndjson_lines(
+    batches: Iterable[Sequence[Row]], dumpb: Callable[[Row], bytes] = _dumpb
+) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(dumpb(row) + b"\n" for row in batch)
+
+
+def csv_lines(batches: Iterable[Sequence[tuple]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
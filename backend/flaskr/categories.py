@@ -0,0 +1,138 @@
+import threading
+import time
+import weakref
+from typing import Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from .models import Category, db
+
+EXTENSION_KEY = "category_registry"
+
+# Writes made by other workers are picked up once the snapshot is this old.
+CATEGORY_CACHE_MAX_AGE = 60.0
+# An unknown id reloads the snapshot, but at most this often.
+NEGATIVE_RELOAD_INTERVAL = 1.0
+
+
+class CategoryRegistry:
+    """
+    In-memory snapshot of the categories table.
+
+    Categories almost never change, so the table is read once and served from
+    memory. Committed ORM writes to Category bump the registry version and
+    the next lookup reloads; writes from other processes are picked up after
+    ``max_age`` seconds.
+    """
+
+    def __init__(self, max_age: float = CATEGORY_CACHE_MAX_AGE):
+        self.max_age = max_age
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._categories: Optional[dict[int, str]] = None
+        self._loaded_at = 0.0
+        self._loaded_version = -1
+        _registries.add(self)
+
+    def _stale(self, now: float) -> bool:
+        return (
+            self._categories is None
+            or self._loaded_version != self.version
+            or now - self._loaded_at > self.max_age
+        )
+
+    def _snapshot(self, reload: bool = False) -> dict[int, str]:
+        now = time.monotonic()
+        with self._lock:
+            if not reload and not self._stale(now):
+                self.hits += 1
+                return self._categories  # type: ignore[return-value]
+            self.misses += 1
+            version = self.version
+
+        # Read outside the lock: in ASGI mode requests share one thread, so a
+        # lock held across the query would block every other request.
+        rows = db.session.execute(select(Category.id, Category.type).order_by(Category.id))
+        categories = {cid: type_ for cid, type_ in rows}
+        with self._lock:
+            self._categories = categories
+            self._loaded_at = now
+            # An invalidation during the read leaves the snapshot stale.
+            self._loaded_version = version
+            return categories
+
+    def all(self) -> dict[int, str]:
+        return dict(self._snapshot())
+
+    def get(self, category_id: int) -> Optional[str]:
+        categories = self._snapshot()
+        if category_id in categories:
+            return categories[category_id]
+        if time.monotonic() - self._loaded_at < NEGATIVE_RELOAD_INTERVAL:
+            return None
+        return self._snapshot(reload=True).get(category_id)
+
+    def exists(self, category_id: int) -> bool:
+        return self.get(category_id) is not None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "version": self.version,
+            "size": len(self._categories or {}),
+        }
+
+
+def get_category_registry() -> Optional[CategoryRegistry]:
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(EXTENSION_KEY)
+
+
+# Invalidate every registry once a transaction that wrote categories commits.
+
+_registries: "weakref.WeakSet[CategoryRegistry]" = weakref.WeakSet()
+_DIRTY = "categories_dirty"
+
+
+def _mark_dirty(session: Optional[Session]) -> None:
+    if session is not None:
+        session.info[_DIRTY] = True
+
+
+@event.listens_for(Category, "after_insert")
+@event.listens_for(Category, "after_update")
+@event.listens_for(Category, "after_delete")
+def _category_written(_mapper, _connection, target: Category) -> None:
+    _mark_dirty(object_session(target))
+
+
+@event.listens_for(Session, "after_bulk_update")
+@event.listens_for(Session, "after_bulk_delete")
+def _categories_bulk_written(context) -> None:
+    if context.mapper.class_ is Category:
+        _mark_dirty(context.session)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_registries(session: Session) -> None:
+    if session.info.pop(_DIRTY, False):
+        for registry in list(_registries):
+            registry.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty(session: Session) -> None:
+    session.info.pop(_DIRTY, None)
@@ -0,0 +1,261 @@
+"""
+Compressed API responses, negotiated with Accept-Encoding.
+
+JSON lists repeat the same keys on every row, so they shrink several times
+over. zstd and brotli are used when their packages are installed (the
+``compression`` extra) and gzip always. Buffered bodies under ``min_size``
+are sent as they are; streamed bodies (the export) are compressed chunk by
+chunk as they are produced.
+
+With ``cache_bytes``, compressed bodies are kept in a per-worker LRU, keyed
+by the request path and query with the response's ETag (or, without one, a
+digest of the body) and the encoding, so a page that many clients fetch is
+compressed once.
+"""
+
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional, Sequence
+
+from flask import Blueprint, Flask, Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised when brotli is absent
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - exercised when zstandard is absent
+    zstandard = None
+
+EXTENSION_KEY = "compression"
+
+# In order of preference, when the client accepts several equally.
+ENCODINGS = ("zstd", "br", "gzip")
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/x-ndjson", "text/csv")
+
+# Levels for dynamic responses: most of the size win for little CPU.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+class _Stream:
+    """An incremental compressor with a ``compress``/``flush`` interface."""
+
+    def __init__(self, encoding: str):
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress, self.flush = self._obj.compress, self._obj.flush
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.compress, self.flush = self._obj.process, self._obj.finish
+        else:
+            # ZstdCompressor is not thread-safe, so each stream has its own.
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self.compress, self.flush = self._obj.compress, self._obj.flush
+
+
+def available_encodings(encodings: Sequence[str] = ENCODINGS) -> tuple[str, ...]:
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    unknown = set(encodings) - set(installed)
+    if unknown:
+        raise ValueError(f"Compression encodings must be among: {', '.join(ENCODINGS)}.")
+    return tuple(encoding for encoding in encodings if installed[encoding])
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    stream = _Stream(encoding)
+    return stream.compress(data) + stream.flush()
+
+
+def compress_chunks(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    stream = _Stream(encoding)
+    for chunk in chunks:
+        out = stream.compress(chunk)
+        if out:
+            yield out
+    yield stream.flush()
+
+
+class CompressedCache:
+    """LRU of compressed bodies, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple[str, str, str], bytes]" = OrderedDict()
+
+    def get(self, key: tuple[str, str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: tuple[str, str, str], body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class Compressor:
+    def __init__(
+        self,
+        encodings: Sequence[str] = ENCODINGS,
+        min_size: int = COMPRESSION_MIN_SIZE,
+        cache_bytes: int = 0,
+    ):
+        self.encodings = available_encodings(encodings)
+        self.min_size = min_size
+        self.cache = CompressedCache(cache_bytes) if cache_bytes else None
+        self.responses = {encoding: 0 for encoding in self.encodings}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+
+    def negotiate(self) -> Optional[str]:
+        """The encoding to use for the current request, or None."""
+        if not self.encodings:
+            return None
+        return request.accept_encodings.best_match(self.encodings)
+
+    def _compress_body(self, response: Response, encoding: str) -> bytes:
+        data = response.get_data()
+        if self.cache is None:
+            return compress(data, encoding)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # The tag alone is not unique across URLs; the path and query are
+            # part of the key so one URL can never be served another's body.
+            key = (request.full_path, etag, encoding)
+        else:
+            key = ("", hashlib.blake2b(data, digest_size=16).hexdigest(), encoding)
+        body = self.cache.get(key)
+        if body is None:
+            body = compress(data, encoding)
+            self.cache.put(key, body)
+        return body
+
+    def apply(self, response: Response) -> Response:
+        if response.status_code == 304 and response.get_etag()[0]:
+            # Answered for whichever representation the client holds; keep
+            # the validator it will compare against.
+            if self.negotiate() is not None:
+                response.set_etag(response.get_etag()[0], weak=True)
+                response.vary.add("Accept-Encoding")
+            return response
+        if (
+            response.status_code != 200
+            or request.method == "HEAD"
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or "Content-Encoding" in response.headers
+            or "no-transform" in response.headers.get("Cache-Control", "")
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            original = response.response
+            response.response = self._stream(response.iter_encoded(), original, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            size = response.content_length or len(response.get_data())
+            if size < self.min_size:
+                return response
+            body = self._compress_body(response, encoding)
+            response.set_data(body)
+            self._count(encoding, size, len(body))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # The compressed bytes differ, so the validator can only be weak.
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _stream(self, chunks: Iterator[bytes], original, encoding: str) -> Iterator[bytes]:
+        sizes = [0, 0]
+
+        def measured(chunks: Iterator[bytes]) -> Iterator[bytes]:
+            for chunk in chunks:
+                sizes[0] += len(chunk)
+                yield chunk
+
+        try:
+            for out in compress_chunks(measured(chunks), encoding):
+                sizes[1] += len(out)
+                yield out
+        finally:
+            # The server closes this generator, not the body it replaced.
+            close = getattr(original, "close", None)
+            if close is not None:
+                close()
+        self._count(encoding, *sizes)
+
+    def _count(self, encoding: str, size: int, compressed: int) -> None:
+        with self._lock:
+            self.responses[encoding] += 1
+            self.bytes_in += size
+            self.bytes_out += compressed
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "responses": dict(self.responses),
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+            }
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+
+def get_compressor() -> Optional[Compressor]:
+    return current_app.extensions.get(EXTENSION_KEY)
+
+
+def compress_responses(bp: Blueprint) -> None:
+    """Compress the responses of ``bp`` for clients that accept it."""
+
+    @bp.after_request
+    def compress_response(response: Response) -> Response:
+        compressor = get_compressor()
+        if compressor is None:
+            return response
+        return compressor.apply(response)
+
+
+def init_compression(app: Flask, **options) -> Compressor:
+    compressor = Compressor(**options)
+    app.extensions[EXTENSION_KEY] = compressor
+    return compressor
@@ -0,0 +1,261 @@
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import Response, current_app, has_app_context, request
+from sqlalchemy import event, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, object_session
+
+from .models import Category, DataVersion, Question, db
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "data_versions"
+VERSIONED_TABLES = (Question.__tablename__, Category.__tablename__)
+
+# How long a worker trusts its copy of the stamps before re-reading them.
+# Writes made through this worker invalidate the copy immediately.
+DATA_VERSION_MAX_AGE = 1.0
+
+POSTGRES_TRIGGERS = (
+    """
+    CREATE OR REPLACE FUNCTION data_versions_bump() RETURNS trigger AS $$
+    BEGIN
+        -- now() is the transaction start, so transactions committing out of
+        -- order could move the stamp back; the wall clock, never backwards,
+        -- cannot.
+        UPDATE data_versions
+           SET version = version + 1, updated_at = GREATEST(updated_at, clock_timestamp())
+         WHERE name = TG_TABLE_NAME;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    *(
+        statement
+        for table in VERSIONED_TABLES
+        for statement in (
+            f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table}",
+            f"CREATE TRIGGER {table}_bump_version "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION data_versions_bump()",
+        )
+    ),
+)
+
+SQLITE_TRIGGERS = tuple(
+    statement
+    for table in VERSIONED_TABLES
+    for op in ("insert", "update", "delete")
+    for statement in (
+        f"DROP TRIGGER IF EXISTS {table}_bump_version_{op}",
+        f"CREATE TRIGGER {table}_bump_version_{op} AFTER {op.upper()} ON {table} "
+        f"BEGIN UPDATE data_versions SET version = version + 1, "
+        f"updated_at = max(updated_at, strftime('%Y-%m-%d %H:%M:%f', 'now')) "
+        f"WHERE name = '{table}'; END",
+    )
+)
+
+TRIGGERS = {"postgresql": POSTGRES_TRIGGERS, "sqlite": SQLITE_TRIGGERS}
+
+
+@event.listens_for(db.metadata, "after_create")
+def _install_on_create(_metadata, connection: Connection, tables=(), **_kw) -> None:
+    names = {table.name for table in tables}
+    if not names & {*VERSIONED_TABLES, DataVersion.__tablename__}:
+        return
+
+    existing = set(connection.execute(select(DataVersion.name)).scalars())
+    for table in VERSIONED_TABLES:
+        if table not in existing:
+            connection.execute(DataVersion.__table__.insert().values(name=table, version=0))
+
+    install_triggers(connection)
+
+
+def install_triggers(connection: Connection) -> bool:
+    statements = TRIGGERS.get(connection.dialect.name)
+    if statements is None:
+        logger.warning(
+            "No data version triggers for dialect %s; conditional requests "
+            "only see writes made through this process.",
+            connection.dialect.name,
+        )
+        return False
+    for statement in statements:
+        connection.execute(text(statement))
+    return True
+
+
+class DataVersions:
+    """
+    Cached copy of the data_versions stamps.
+
+    Reading the stamps is one tiny query, and most requests skip even that:
+    the copy is trusted for ``max_age`` seconds, so a matching If-None-Match
+    is answered without touching the database.
+    """
+
+    def __init__(self, max_age: float = DATA_VERSION_MAX_AGE):
+        self.max_age = max_age
+        self.local_writes = 0
+        self._lock = threading.Lock()
+        self._stamps: dict[str, tuple[int, datetime]] = {}
+        self._loaded_at: Optional[float] = None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.local_writes += 1
+            self._loaded_at = None
+
+    def current(self) -> dict[str, tuple[int, datetime]]:
+        now = time.monotonic()
+        with self._lock:
+            if self._loaded_at is not None and now - self._loaded_at < self.max_age:
+                return self._stamps
+            local_writes = self.local_writes
+
+        # The query runs outside the lock so ASGI requests sharing this
+        # thread are not blocked behind it.
+        rows = db.session.execute(
+            select(DataVersion.name, DataVersion.version, DataVersion.updated_at)
+        )
+        stamps = {name: (version, updated_at) for name, version, updated_at in rows}
+        with self._lock:
+            self._stamps = stamps
+            # Trust the copy only if no local write committed during the read.
+            self._loaded_at = now if local_writes == self.local_writes else None
+            return stamps
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _http_date(stamp: datetime) -> Optional[datetime]:
+    """
+    ``stamp`` rounded up to the whole second an HTTP date can carry, or None
+    while that second is still running: a write later in it would get the
+    same date, so the date cannot be given out yet.
+    """
+    whole = stamp.replace(microsecond=0)
+    if whole != stamp:
+        whole += timedelta(seconds=1)
+    return whole if _utcnow() >= whole else None
+
+
+def _path_digest(full_path: str) -> str:
+    return hashlib.blake2b(full_path.encode(), digest_size=16).hexdigest()
+
+
+def conditional(
+    tables: tuple[str, ...] = VERSIONED_TABLES, cache_control: str = "no-cache"
+) -> Callable:
+    """
+    Add ETag, Last-Modified and Cache-Control to a GET view and answer
+    If-None-Match / If-Modified-Since with 304 before the view runs.
+
+    The ETag combines the data versions of ``tables`` with a digest of the
+    request path and query, so it changes whenever any of them is written.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions: DataVersions = current_app.extensions[EXTENSION_KEY]
+            try:
+                stamps = versions.current()
+            except SQLAlchemyError:
+                logger.warning("Data versions unavailable; serving without validators.")
+                db.session.rollback()
+                return view(*args, **kwargs)
+
+            found = [stamps[t] for t in tables if t in stamps]
+            etag = "v{}-{}".format(
+                ".".join(str(stamps[t][0]) if t in stamps else "0" for t in tables),
+                _path_digest(request.full_path),
+            )
+            last_modified = max((_as_utc(at) for _, at in found), default=None)
+            if last_modified is not None:
+                last_modified = _http_date(last_modified)
+
+            if request.if_none_match:
+                # Compressed responses carry the tag weakened (W/"..."), and
+                # If-None-Match compares weakly, so either form matches.
+                not_modified = request.if_none_match.contains_weak(etag)
+            elif last_modified is not None and request.if_modified_since is not None:
+                # Both are whole seconds, so an echoed Last-Modified matches.
+                not_modified = last_modified <= request.if_modified_since
+            else:
+                not_modified = False
+
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = cache_control
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def get_data_versions() -> Optional[DataVersions]:
+    return current_app.extensions.get(EXTENSION_KEY)
+
+
+# Local writes invalidate this worker's copy as soon as they commit.
+
+_DIRTY = "data_versions_dirty"
+
+
+@event.listens_for(Question, "after_insert")
+@event.listens_for(Question, "after_update")
+@event.listens_for(Question, "after_delete")
+@event.listens_for(Category, "after_insert")
+@event.listens_for(Category, "after_update")
+@event.listens_for(Category, "after_delete")
+def _row_written(_mapper, _connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info[_DIRTY] = True
+
+
+@event.listens_for(Session, "after_bulk_update")
+@event.listens_for(Session, "after_bulk_delete")
+def _bulk_written(context) -> None:
+    if context.mapper.class_ in (Question, Category):
+        context.session.info[_DIRTY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate(session: Session) -> None:
+    if session.info.pop(_DIRTY, False):
+        if has_app_context():
+            versions = get_data_versions()
+            if versions is not None:
+                versions.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_DIRTY, None)
@@ -3,6 +3,9 @@ import os
 from abc import ABC, abstractmethod
 
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+
+from .pooling import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 
 
 class ConfigBase(ABC):
@@ -27,8 +30,287 @@ class ConfigBase(ABC):
     @abstractmethod
     def SECRET_KEY(self) -> str: ...
 
+    # Connection pool defaults, per worker process. Each can be overridden
+    # with the environment variable of the same name.
+    DB_POOL_SIZE_DEFAULT = 5
+    DB_MAX_OVERFLOW_DEFAULT = 10
+    DB_POOL_TIMEOUT_DEFAULT = 30
+    DB_POOL_RECYCLE_DEFAULT = -1
+    DB_POOL_PRE_PING_DEFAULT = False
+    DB_STATEMENT_TIMEOUT_MS_DEFAULT = 0
+
+    def _env_int(self, name: str, default: int, minimum: int = 0) -> int:
+        value = os.getenv(name)
+        if value is None or value == "":
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            self.logger.error(f"{name} must be an integer.")
+            raise ValueError(f"{name} must be an integer.")
+        if number < minimum:
+            self.logger.error(f"{name} must be at least {minimum}.")
+            raise ValueError(f"{name} must be at least {minimum}.")
+        return number
+
+    def _env_bool(self, name: str, default: bool) -> bool:
+        value = os.getenv(name)
+        if value is None or value == "":
+            return default
+        if value.lower() in ("1", "true", "yes", "on"):
+            return True
+        if value.lower() in ("0", "false", "no", "off"):
+            return False
+        self.logger.error(f"{name} must be a boolean.")
+        raise ValueError(f"{name} must be a boolean.")
+
+    @property
+    def DB_POOL_SIZE(self) -> int:
+        return self._env_int("DB_POOL_SIZE", self.DB_POOL_SIZE_DEFAULT, minimum=1)
+
+    @property
+    def DB_MAX_OVERFLOW(self) -> int:
+        return self._env_int("DB_MAX_OVERFLOW", self.DB_MAX_OVERFLOW_DEFAULT)
+
+    @property
+    def DB_POOL_TIMEOUT(self) -> int:
+        """Seconds a request waits for a free connection before failing."""
+        return self._env_int("DB_POOL_TIMEOUT", self.DB_POOL_TIMEOUT_DEFAULT, minimum=1)
+
+    @property
+    def DB_POOL_RECYCLE(self) -> int:
+        """Seconds after which a connection is replaced; -1 never recycles."""
+        return self._env_int("DB_POOL_RECYCLE", self.DB_POOL_RECYCLE_DEFAULT, minimum=-1)
+
+    @property
+    def DB_POOL_PRE_PING(self) -> bool:
+        return self._env_bool("DB_POOL_PRE_PING", self.DB_POOL_PRE_PING_DEFAULT)
+
+    @property
+    def DB_STATEMENT_TIMEOUT_MS(self) -> int:
+        """Postgres statement_timeout for every connection; 0 disables it."""
+        return self._env_int("DB_STATEMENT_TIMEOUT_MS", self.DB_STATEMENT_TIMEOUT_MS_DEFAULT)
+
+    # Read replicas, as a comma-separated list of URLs in this variable.
+    REPLICA_URLS_ENV = "DATABASE_REPLICA_URLS"
+    DB_REPLICA_POLICY_DEFAULT = "round_robin"
+
+    @property
+    def DATABASE_REPLICA_URLS(self) -> list[str]:
+        value = os.getenv(self.REPLICA_URLS_ENV, "")
+        return [url.strip() for url in value.split(",") if url.strip()]
+
+    @property
+    def DB_REPLICA_POLICY(self) -> str:
+        """How reads are spread over replicas: round_robin, random or least_busy."""
+        return os.getenv("DB_REPLICA_POLICY") or self.DB_REPLICA_POLICY_DEFAULT
+
+    # Statements slower than this are logged; 0 turns the log off.
+    DB_SLOW_QUERY_MS_DEFAULT = 0
+    DB_SLOW_QUERY_EXPLAIN_DEFAULT = False
+    QUERY_BUDGET_MODE_DEFAULT = "warn"
+
+    @property
+    def DB_SLOW_QUERY_MS(self) -> int:
+        return self._env_int("DB_SLOW_QUERY_MS", self.DB_SLOW_QUERY_MS_DEFAULT)
+
+    @property
+    def DB_SLOW_QUERY_EXPLAIN(self) -> bool:
+        """Log the plan of slow SELECTs, at the cost of running EXPLAIN."""
+        return self._env_bool("DB_SLOW_QUERY_EXPLAIN", self.DB_SLOW_QUERY_EXPLAIN_DEFAULT)
+
+    @property
+    def QUERY_BUDGET_MODE(self) -> str:
+        """What a request over its query budget does: off, warn or raise."""
+        return os.getenv("QUERY_BUDGET_MODE") or self.QUERY_BUDGET_MODE_DEFAULT
+
+    @property
+    def QUERY_LOG_OPTIONS(self) -> dict:
+        return {
+            "slow_query_ms": self.DB_SLOW_QUERY_MS,
+            "explain": self.DB_SLOW_QUERY_EXPLAIN,
+            "budget_mode": self.QUERY_BUDGET_MODE,
+        }
+
+    # Admission control, per worker. Each route is cheap, standard or
+    # expensive; a class with a limit of 0 admits every request.
+    ADMISSION_CHEAP_LIMIT_DEFAULT = 0
+    ADMISSION_STANDARD_LIMIT_DEFAULT = 0
+    ADMISSION_EXPENSIVE_LIMIT_DEFAULT = 0
+    ADMISSION_QUEUE_SIZE_DEFAULT = 0
+    ADMISSION_QUEUE_TIMEOUT_MS_DEFAULT = 0
+    ADMISSION_RETRY_AFTER_DEFAULT = 1
+
+    @property
+    def ADMISSION_CHEAP_LIMIT(self) -> int:
+        return self._env_int("ADMISSION_CHEAP_LIMIT", self.ADMISSION_CHEAP_LIMIT_DEFAULT)
+
+    @property
+    def ADMISSION_STANDARD_LIMIT(self) -> int:
+        return self._env_int("ADMISSION_STANDARD_LIMIT", self.ADMISSION_STANDARD_LIMIT_DEFAULT)
+
+    @property
+    def ADMISSION_EXPENSIVE_LIMIT(self) -> int:
+        return self._env_int("ADMISSION_EXPENSIVE_LIMIT", self.ADMISSION_EXPENSIVE_LIMIT_DEFAULT)
+
+    @property
+    def ADMISSION_QUEUE_SIZE(self) -> int:
+        """Requests of each class that may wait for a slot; the rest get a 503."""
+        return self._env_int("ADMISSION_QUEUE_SIZE", self.ADMISSION_QUEUE_SIZE_DEFAULT)
+
+    @property
+    def ADMISSION_QUEUE_TIMEOUT_MS(self) -> int:
+        return self._env_int(
+            "ADMISSION_QUEUE_TIMEOUT_MS", self.ADMISSION_QUEUE_TIMEOUT_MS_DEFAULT
+        )
+
+    @property
+    def ADMISSION_RETRY_AFTER(self) -> int:
+        """Seconds sent in the Retry-After header of a 503."""
+        return self._env_int("ADMISSION_RETRY_AFTER", self.ADMISSION_RETRY_AFTER_DEFAULT)
+
+    @property
+    def ADMISSION_OPTIONS(self) -> dict:
+        return {
+            "limits": {
+                "cheap": self.ADMISSION_CHEAP_LIMIT,
+                "standard": self.ADMISSION_STANDARD_LIMIT,
+                "expensive": self.ADMISSION_EXPENSIVE_LIMIT,
+            },
+            "queue_size": self.ADMISSION_QUEUE_SIZE,
+            "queue_timeout_ms": self.ADMISSION_QUEUE_TIMEOUT_MS,
+            "retry_after": self.ADMISSION_RETRY_AFTER,
+        }
+
+    # Response compression. Encodings are listed in order of preference;
+    # zstd and br are skipped when their packages are not installed.
+    COMPRESSION_ENCODINGS_DEFAULT = "zstd,br,gzip"
+    COMPRESSION_MIN_SIZE_DEFAULT = 1024
+    COMPRESSION_CACHE_BYTES_DEFAULT = 0
+
+    @property
+    def COMPRESSION_ENCODINGS(self) -> list[str]:
+        value = os.getenv("COMPRESSION_ENCODINGS")
+        if value is None:
+            value = self.COMPRESSION_ENCODINGS_DEFAULT
+        return [encoding.strip() for encoding in value.split(",") if encoding.strip()]
+
+    @property
+    def COMPRESSION_MIN_SIZE(self) -> int:
+        """Buffered bodies smaller than this many bytes are sent uncompressed."""
+        return self._env_int("COMPRESSION_MIN_SIZE", self.COMPRESSION_MIN_SIZE_DEFAULT)
+
+    @property
+    def COMPRESSION_CACHE_BYTES(self) -> int:
+        """Size of the per-worker cache of compressed bodies; 0 disables it."""
+        return self._env_int("COMPRESSION_CACHE_BYTES", self.COMPRESSION_CACHE_BYTES_DEFAULT)
+
+    @property
+    def COMPRESSION_OPTIONS(self) -> dict:
+        return {
+            "encodings": self.COMPRESSION_ENCODINGS,
+            "min_size": self.COMPRESSION_MIN_SIZE,
+            "cache_bytes": self.COMPRESSION_CACHE_BYTES,
+        }
+
+    # JSON encoding: auto (orjson when it is installed), orjson or stdlib.
+    JSON_BACKEND_DEFAULT = "auto"
+
+    @property
+    def JSON_BACKEND(self) -> str:
+        return os.getenv("JSON_BACKEND") or self.JSON_BACKEND_DEFAULT
+
+    # Startup. SCHEMA_CHECK is create (create_all on every start), version
+    # (create_all only when the schema_version marker is behind) or skip.
+    SCHEMA_CHECK_DEFAULT = "create"
+    DB_POOL_PREWARM_DEFAULT = 0
+    PREWARM_CACHES_DEFAULT = False
+    PREWARM_SEARCH_INDEX_DEFAULT = False
+
+    @property
+    def SCHEMA_CHECK(self) -> str:
+        return os.getenv("SCHEMA_CHECK") or self.SCHEMA_CHECK_DEFAULT
+
+    @property
+    def DB_POOL_PREWARM(self) -> int:
+        """Connections opened in each pool before the app reports ready."""
+        return self._env_int("DB_POOL_PREWARM", self.DB_POOL_PREWARM_DEFAULT)
+
+    @property
+    def PREWARM_CACHES(self) -> bool:
+        """Load the category and data version caches on startup."""
+        return self._env_bool("PREWARM_CACHES", self.PREWARM_CACHES_DEFAULT)
+
+    @property
+    def PREWARM_SEARCH_INDEX(self) -> bool:
+        """
+        Build the in-process search index on startup. It reads every
+        question, so it is off unless asked for. Postgres search needs no warming.
+        """
+        return self._env_bool("PREWARM_SEARCH_INDEX", self.PREWARM_SEARCH_INDEX_DEFAULT)
+
+    @property
+    def STARTUP_OPTIONS(self) -> dict:
+        return {
+            "schema_check": self.SCHEMA_CHECK,
+            "pool_prewarm": self.DB_POOL_PREWARM,
+            "prewarm_caches": self.PREWARM_CACHES,
+            "prewarm_search": self.PREWARM_SEARCH_INDEX,
+        }
+
+    @property
+    def SQLALCHEMY_ENGINE_OPTIONS(self) -> dict:
+        return self.engine_options(self.SQLALCHEMY_DATABASE_URI)
+
+    def as_app_config(self) -> dict:
+        """
+        Everything ``create_app`` reads, resolved once. Each property reads
+        the environment again, so the app is built from this snapshot.
+        """
+        database_uri = self.SQLALCHEMY_DATABASE_URI
+        return {
+            "SQLALCHEMY_DATABASE_URI": database_uri,
+            "SQLALCHEMY_ENGINE_OPTIONS": self.engine_options(database_uri),
+            "SQLALCHEMY_REPLICA_URIS": self.DATABASE_REPLICA_URLS,
+            "REPLICA_POLICY": self.DB_REPLICA_POLICY,
+            "QUERY_LOG_OPTIONS": self.QUERY_LOG_OPTIONS,
+            "ADMISSION_OPTIONS": self.ADMISSION_OPTIONS,
+            "COMPRESSION_OPTIONS": self.COMPRESSION_OPTIONS,
+            "JSON_BACKEND": self.JSON_BACKEND,
+            "STARTUP_OPTIONS": self.STARTUP_OPTIONS,
+        }
+
+    def engine_options(self, database_uri: str) -> dict:
+        """
+        Pool and timeout settings for Flask-SQLAlchemy's engine on
+        ``database_uri``. Only Postgres gets them; other databases keep
+        SQLAlchemy's defaults.
+        """
+        url = make_url(database_uri)
+        if url.get_backend_name() != "postgresql":
+            return {}
+        is_async = url.get_driver_name() == "asyncpg"
+        options = {
+            "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_timeout": self.DB_POOL_TIMEOUT,
+            "pool_recycle": self.DB_POOL_RECYCLE,
+            "pool_pre_ping": self.DB_POOL_PRE_PING,
+        }
+        timeout = self.DB_STATEMENT_TIMEOUT_MS
+        if timeout and is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout)}}
+        elif timeout:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+        return options
+
 
 class AppTestingConfig(ConfigBase):
+    REPLICA_URLS_ENV = "TEST_DATABASE_REPLICA_URLS"
+    # A route that starts issuing more queries fails its tests.
+    QUERY_BUDGET_MODE_DEFAULT = "raise"
+
     def __init__(self, testing: bool = True):
         if not testing:
             raise ValueError("AppTestingConfig must be initialized with testing=True")
@@ -66,6 +348,29 @@ class AppTestingConfig(ConfigBase):
 
 
 class ProductionConfig(ConfigBase):
+    # Several workers share the database, so each keeps a small pool, fails
+    # fast when it is exhausted, and drops connections a proxy may have cut.
+    DB_POOL_SIZE_DEFAULT = 5
+    DB_MAX_OVERFLOW_DEFAULT = 5
+    DB_POOL_TIMEOUT_DEFAULT = 10
+    DB_POOL_RECYCLE_DEFAULT = 1800
+    DB_POOL_PRE_PING_DEFAULT = True
+    DB_STATEMENT_TIMEOUT_MS_DEFAULT = 15_000
+    DB_SLOW_QUERY_MS_DEFAULT = 500
+    # Expensive routes get fewer slots than the pool has connections, so a
+    # slow database sheds quiz and search load before it starves the rest.
+    ADMISSION_CHEAP_LIMIT_DEFAULT = 64
+    ADMISSION_STANDARD_LIMIT_DEFAULT = 8
+    ADMISSION_EXPENSIVE_LIMIT_DEFAULT = 4
+    ADMISSION_QUEUE_SIZE_DEFAULT = 16
+    ADMISSION_QUEUE_TIMEOUT_MS_DEFAULT = 1000
+    COMPRESSION_CACHE_BYTES_DEFAULT = 8 * 1024 * 1024
+    # Deploys that add a migration are upgraded on start; other restarts
+    # only read the marker.
+    SCHEMA_CHECK_DEFAULT = "version"
+    DB_POOL_PREWARM_DEFAULT = 2
+    PREWARM_CACHES_DEFAULT = True
+
     def __init__(self, testing: bool = True):
         if testing:
             self.logger.error(
@@ -95,6 +400,18 @@ class ProductionConfig(ConfigBase):
         self.logger.debug("Using Production DATABASE_URL")
         return DATABASE_URL
 
+    @property
+    def DATABASE_REPLICA_URLS(self) -> list[str]:
+        urls = super().DATABASE_REPLICA_URLS
+        if any("test" in url.lower() for url in urls):
+            self.logger.error(
+                "test cannot appear in replica URLs for production database."
+            )
+            raise ValueError(
+                "test cannot appear in replica URLs for production database."
+            )
+        return urls
+
     @property
     def SQLALCHEMY_TRACK_MODIFICATIONS(self) -> bool:
         return False
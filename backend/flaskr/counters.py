@@ -0,0 +1,178 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models import Question, QuestionCount, db
+
+logger = logging.getLogger(__name__)
+
+# Questions with a NULL category or difficulty (the seed schema allows both)
+# are counted under 0.
+UNSET = 0
+
+# Postgres counts per statement, from the statement's transition tables, so a
+# COPY or multi-row write touches each counter row once rather than once per
+# question. Deltas are applied in key order, so concurrent writers lock the
+# counter rows in the same order and cannot deadlock on them.
+_POSTGRES_APPLY = """
+    CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+    DECLARE
+        delta record;
+    BEGIN
+        FOR delta IN
+            SELECT category, difficulty, SUM(n) AS n FROM (
+                SELECT COALESCE(category, 0) AS category,
+                       COALESCE(difficulty, 0) AS difficulty, {sign} AS n
+                  FROM {rows}
+            ) changes
+            GROUP BY category, difficulty
+            HAVING SUM(n) <> 0
+            ORDER BY category, difficulty
+        LOOP
+            INSERT INTO question_counts (category, difficulty, total)
+            VALUES (delta.category, delta.difficulty, delta.n)
+            ON CONFLICT (category, difficulty)
+            DO UPDATE SET total = question_counts.total + EXCLUDED.total;
+        END LOOP;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+POSTGRES_TRIGGERS = (
+    _POSTGRES_APPLY.format(name="question_counts_insert", sign="1", rows="new_rows"),
+    _POSTGRES_APPLY.format(name="question_counts_delete", sign="-1", rows="old_rows"),
+    _POSTGRES_APPLY.format(
+        name="question_counts_update",
+        sign="n",
+        rows="(SELECT category, difficulty, -1 AS n FROM old_rows "
+        "UNION ALL SELECT category, difficulty, 1 FROM new_rows) moved",
+    ),
+    """
+    CREATE OR REPLACE FUNCTION question_counts_clear() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM question_counts;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    # Replaced by the statement-level triggers below.
+    "DROP TRIGGER IF EXISTS questions_count_rows ON questions",
+    "DROP FUNCTION IF EXISTS question_counts_apply()",
+    "DROP TRIGGER IF EXISTS questions_count_insert ON questions",
+    """
+    CREATE TRIGGER questions_count_insert
+    AFTER INSERT ON questions REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION question_counts_insert()
+    """,
+    "DROP TRIGGER IF EXISTS questions_count_delete ON questions",
+    """
+    CREATE TRIGGER questions_count_delete
+    AFTER DELETE ON questions REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION question_counts_delete()
+    """,
+    "DROP TRIGGER IF EXISTS questions_count_update ON questions",
+    """
+    CREATE TRIGGER questions_count_update
+    AFTER UPDATE ON questions REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION question_counts_update()
+    """,
+    "DROP TRIGGER IF EXISTS questions_count_truncate ON questions",
+    """
+    CREATE TRIGGER questions_count_truncate
+    AFTER TRUNCATE ON questions
+    FOR EACH STATEMENT EXECUTE FUNCTION question_counts_clear()
+    """,
+)
+
+_SQLITE_INCREMENT = """
+    INSERT INTO question_counts (category, difficulty, total)
+    VALUES (COALESCE(NEW.category, 0), COALESCE(NEW.difficulty, 0), 1)
+    ON CONFLICT (category, difficulty) DO UPDATE SET total = total + 1;
+"""
+_SQLITE_DECREMENT = """
+    UPDATE question_counts SET total = total - 1
+     WHERE category = COALESCE(OLD.category, 0)
+       AND difficulty = COALESCE(OLD.difficulty, 0);
+"""
+
+SQLITE_TRIGGERS = (
+    "DROP TRIGGER IF EXISTS questions_count_insert",
+    "DROP TRIGGER IF EXISTS questions_count_delete",
+    "DROP TRIGGER IF EXISTS questions_count_update",
+    f"CREATE TRIGGER questions_count_insert AFTER INSERT ON questions "
+    f"BEGIN {_SQLITE_INCREMENT} END",
+    f"CREATE TRIGGER questions_count_delete AFTER DELETE ON questions "
+    f"BEGIN {_SQLITE_DECREMENT} END",
+    f"CREATE TRIGGER questions_count_update AFTER UPDATE OF category, difficulty "
+    f"ON questions BEGIN {_SQLITE_DECREMENT} {_SQLITE_INCREMENT} END",
+)
+
+TRIGGERS = {"postgresql": POSTGRES_TRIGGERS, "sqlite": SQLITE_TRIGGERS}
+
+
+def install_triggers(connection: Connection) -> bool:
+    statements = TRIGGERS.get(connection.dialect.name)
+    if statements is None:
+        logger.warning(
+            "No question count triggers for dialect %s; counts will drift "
+            "until reconciled.",
+            connection.dialect.name,
+        )
+        return False
+    for statement in statements:
+        connection.execute(text(statement))
+    return True
+
+
+def reconcile(connection: Connection) -> int:
+    """Recompute every counter from the questions table. Returns the total."""
+    if connection.dialect.name == "postgresql":
+        # Block writers (not readers) so no trigger runs between the two steps.
+        connection.execute(text("LOCK TABLE questions IN SHARE MODE"))
+    connection.execute(QuestionCount.__table__.delete())
+    connection.execute(
+        text(
+            "INSERT INTO question_counts (category, difficulty, total) "
+            "SELECT COALESCE(category, 0), COALESCE(difficulty, 0), COUNT(*) "
+            "FROM questions GROUP BY COALESCE(category, 0), COALESCE(difficulty, 0)"
+        )
+    )
+    return connection.execute(
+        select(func.coalesce(func.sum(QuestionCount.total), 0))
+    ).scalar_one()
+
+
+@event.listens_for(db.metadata, "after_create")
+def _install_on_create(_metadata, connection: Connection, tables=(), **_kw) -> None:
+    names = {table.name for table in tables}
+    if names & {Question.__tablename__, QuestionCount.__tablename__}:
+        if install_triggers(connection):
+            reconcile(connection)
+
+
+def total_questions(session: Session, category: Optional[int] = None) -> int:
+    stmt = select(func.coalesce(func.sum(QuestionCount.total), 0))
+    if category is not None:
+        stmt = stmt.where(QuestionCount.category == category)
+    return session.execute(stmt).scalar_one()
+
+
+def breakdown(session: Session) -> dict:
+    by_category: dict[int, int] = {}
+    by_difficulty: dict[int, int] = {}
+    for category, difficulty, total in session.execute(
+        select(QuestionCount.category, QuestionCount.difficulty, QuestionCount.total)
+    ):
+        if total <= 0:
+            continue
+        by_category[category] = by_category.get(category, 0) + total
+        by_difficulty[difficulty] = by_difficulty.get(difficulty, 0) + total
+    return {
+        "total_questions": sum(by_category.values()),
+        "by_category": dict(sorted(by_category.items())),
+        "by_difficulty": dict(sorted(by_difficulty.items())),
+    }
@@ -0,0 +1,270 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+from flask import Blueprint, Flask, Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+EXTENSION_KEY = "metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "trivia"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "<unmatched>"
+
+_STARTED = "metrics_started"
+_QUERIES = "metrics_db_queries"
+_DB_SECONDS = "metrics_db_seconds"
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_
+        self.label_names = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.label_names, labels)} {value:g}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_: str, labels: tuple[str, ...], buckets: tuple[float, ...]
+    ):
+        self.name = name
+        self.help = help_
+        self.label_names = labels
+        self.buckets = buckets
+        # Per label set: one count per bucket (not cumulative), then sum and count.
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._values.items()]
+        names = (*self.label_names, "le")
+        for labels, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket
+                yield f"{self.name}_bucket{_labels(names, (*labels, bound))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {total:g}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {count}"
+
+
+class Metrics:
+    """
+    Request and database metrics for one app.
+
+    Recording is a dict update under a lock per request; the text format is
+    only built when ``/metrics`` is scraped.
+    """
+
+    def __init__(self):
+        self.requests = Counter(
+            f"{PREFIX}_http_requests_total",
+            "HTTP requests by route, method and status.",
+            ("method", "route", "status"),
+        )
+        self.latency = Histogram(
+            f"{PREFIX}_http_request_duration_seconds",
+            "Time to build the response, by route.",
+            ("method", "route"),
+            LATENCY_BUCKETS,
+        )
+        self.in_flight = Gauge(
+            f"{PREFIX}_http_requests_in_flight", "Requests currently being handled."
+        )
+        self.db_queries = Histogram(
+            f"{PREFIX}_http_request_db_queries",
+            "SQL statements executed per request, by route.",
+            ("method", "route"),
+            QUERY_COUNT_BUCKETS,
+        )
+        self.db_seconds = Histogram(
+            f"{PREFIX}_http_request_db_seconds",
+            "Time spent executing SQL per request, by route.",
+            ("method", "route"),
+            LATENCY_BUCKETS,
+        )
+        self.collectors: list[Callable[[], Iterable[str]]] = []
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.requests, self.latency, self.in_flight, self.db_queries, self.db_seconds):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collect in self.collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+# Pool stats are read at scrape time. Cumulative ones are counters.
+POOL_COUNTERS = ("connects", "checkouts", "checkins", "invalidations", "timeouts")
+POOL_GAUGES = ("size", "checked_out", "checked_in", "overflow", "wait_ms_avg", "wait_ms_max")
+
+
+def pool_samples(pools: Iterable[tuple[str, dict]]) -> Iterable[str]:
+    """Pool stats, as returned by ``pool_stats``, for each named pool."""
+    pools = list(pools)
+    for key in POOL_GAUGES + POOL_COUNTERS:
+        kind = "counter" if key in POOL_COUNTERS else "gauge"
+        name = f"{PREFIX}_db_pool_{key}" + ("_total" if kind == "counter" else "")
+        samples = [
+            f'{name}{_labels(("pool",), (pool,))} {stats[key]:g}'
+            for pool, stats in pools
+            if key in stats
+        ]
+        if samples:
+            yield f"# TYPE {name} {kind}"
+            yield from samples
+
+
+def admission_samples(classes: dict[str, dict]) -> Iterable[str]:
+    """Admission state, as returned by ``AdmissionController.stats``, per cost class."""
+    for key, kind in (("in_flight", "gauge"), ("waiting", "gauge"), ("admitted", "counter")):
+        name = f"{PREFIX}_admission_{key}" + ("_total" if kind == "counter" else "")
+        yield f"# TYPE {name} {kind}"
+        for cost_class, stats in classes.items():
+            yield f'{name}{_labels(("class",), (cost_class,))} {stats[key]:g}'
+    name = f"{PREFIX}_admission_rejected_total"
+    yield f"# TYPE {name} counter"
+    for cost_class, stats in classes.items():
+        for reason, count in stats["rejected"].items():
+            yield f'{name}{_labels(("class", "reason"), (cost_class, reason))} {count:g}'
+
+
+def compression_samples(stats: dict) -> Iterable[str]:
+    """Compressed responses and bytes before and after, per encoding."""
+    name = f"{PREFIX}_compression_responses_total"
+    yield f"# TYPE {name} counter"
+    for encoding, count in stats["responses"].items():
+        yield f'{name}{_labels(("encoding",), (encoding,))} {count:g}'
+    for key in ("bytes_in", "bytes_out"):
+        name = f"{PREFIX}_compression_{key}_total"
+        yield f"# TYPE {name} counter"
+        yield f"{name} {stats[key]:g}"
+
+
+def startup_samples(phases: dict[str, float]) -> Iterable[str]:
+    """Seconds the app took to start, per phase and in total."""
+    name = f"{PREFIX}_startup_seconds"
+    yield f"# TYPE {name} gauge"
+    for phase, seconds in phases.items():
+        yield f'{name}{_labels(("phase",), (phase,))} {seconds:g}'
+
+
+def _route() -> tuple[str, str]:
+    rule = request.url_rule
+    return request.method, rule.rule if rule is not None else UNMATCHED_ROUTE
+
+
+def instrument(bp: Blueprint) -> None:
+    """Record latency, status and SQL use for every request to ``bp``."""
+
+    @bp.before_request
+    def start_timer() -> None:
+        metrics: Optional[Metrics] = current_app.extensions.get(EXTENSION_KEY)
+        if metrics is None:
+            return
+        setattr(g, _STARTED, time.perf_counter())
+        setattr(g, _QUERIES, 0)
+        setattr(g, _DB_SECONDS, 0.0)
+        metrics.in_flight.inc()
+
+    @bp.after_request
+    def record(response: Response) -> Response:
+        metrics: Optional[Metrics] = current_app.extensions.get(EXTENSION_KEY)
+        started = g.get(_STARTED)
+        if metrics is None or started is None:
+            return response
+        method, route = _route()
+        metrics.latency.observe(time.perf_counter() - started, method, route)
+        metrics.requests.inc(method, route, str(response.status_code))
+        metrics.db_queries.observe(g.get(_QUERIES, 0), method, route)
+        metrics.db_seconds.observe(g.get(_DB_SECONDS, 0.0), method, route)
+        return response
+
+    @bp.teardown_request
+    def finish(_error: Optional[BaseException]) -> None:
+        metrics: Optional[Metrics] = current_app.extensions.get(EXTENSION_KEY)
+        if metrics is not None and g.pop(_STARTED, None) is not None:
+            metrics.in_flight.dec()
+
+
+def init_metrics(app: Flask, collectors: Iterable[Callable[[], Iterable[str]]] = ()) -> Metrics:
+    metrics = Metrics()
+    metrics.collectors.extend(collectors)
+    app.extensions[EXTENSION_KEY] = metrics
+
+    @app.route("/metrics", methods=["GET"])
+    def export_metrics():
+        return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+    return metrics
+
+
+# SQL timing, charged to the current request.
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, context, _executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, _cursor, _statement, _parameters, context, _executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None or not has_request_context() or _STARTED not in g:
+        return
+    g.setdefault(_QUERIES, 0)
+    g.setdefault(_DB_SECONDS, 0.0)
+    setattr(g, _QUERIES, getattr(g, _QUERIES) + 1)
+    setattr(g, _DB_SECONDS, getattr(g, _DB_SECONDS) + time.perf_counter() - started)
@@ -0,0 +1,206 @@
+"""
+Versioned schema changes.
+
+    flask --app flaskr migrate --list
+    SCHEMA_CHECK=skip flask --app flaskr migrate
+
+``create_all`` creates missing tables but never changes one that exists, so
+an index or trigger added to the models only reaches new databases. Each
+such change is also a migration here. ``upgrade`` creates missing tables,
+then runs the migrations newer than the version in ``schema_version``,
+stamping it after each one. A database ``upgrade`` creates from nothing
+already has everything and is stamped with the latest version directly.
+
+Migrations must be idempotent: a run cut short repeats its last step.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+from sqlalchemy import delete, inspect, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import conditional, counters
+from .models import Question, SchemaVersion, db
+from .search import TRIGRAM_INDEXES
+
+logger = logging.getLogger(__name__)
+
+# Held by the process migrating, so workers starting together wait for the
+# first one instead of running the same DDL.
+ADVISORY_LOCK_KEY = 0x7472_6976
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+    # Non-transactional migrations run in autocommit mode, which Postgres
+    # needs to build indexes CONCURRENTLY, without blocking writes.
+    transactional: bool = True
+
+
+def create_index(
+    connection: Connection, name: str, table: str, columns: str, using: Optional[str] = None
+) -> None:
+    method = f" USING {using}" if using else ""
+    if connection.dialect.name != "postgresql":
+        connection.execute(
+            text(f"CREATE INDEX IF NOT EXISTS {name} ON {table}{method} ({columns})")
+        )
+        return
+    # A concurrent build that failed leaves an invalid index behind, which
+    # IF NOT EXISTS would keep. Drop it and build again.
+    invalid = connection.execute(
+        text(
+            "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+            "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    connection.execute(
+        text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}{method} ({columns})")
+    )
+
+
+def _baseline(_connection: Connection) -> None:
+    """The tables ``create_all`` makes."""
+
+
+def _category_indexes(connection: Connection) -> None:
+    for index in Question.__table__.indexes:
+        columns = ", ".join(column.name for column in index.columns)
+        create_index(connection, index.name, Question.__tablename__, columns)
+
+
+def _statement_count_triggers(connection: Connection) -> None:
+    if counters.install_triggers(connection):
+        counters.reconcile(connection)
+
+
+def _quiz_sessions_table(_connection: Connection) -> None:
+    """``quiz_sessions``, which ``create_all`` makes before migrations run."""
+
+
+def _monotonic_data_versions(connection: Connection) -> None:
+    conditional.install_triggers(connection)
+
+
+def create_trigram_indexes(connection: Connection) -> bool:
+    """
+    Build the pg_trgm search indexes concurrently. Returns False, and leaves
+    search on ILIKE, when the extension cannot be created.
+    """
+    try:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except SQLAlchemyError as e:
+        logger.warning("pg_trgm unavailable, skipping its indexes: %s", e.__class__.__name__)
+        return False
+    for name, column in TRIGRAM_INDEXES:
+        create_index(
+            connection, name, Question.__tablename__, f"{column} gin_trgm_ops", using="gin"
+        )
+    return True
+
+
+def _trigram_indexes(connection: Connection) -> None:
+    if connection.dialect.name == "postgresql":
+        create_trigram_indexes(connection)
+
+
+MIGRATIONS = (
+    Migration(1, "Baseline schema", _baseline),
+    Migration(
+        2,
+        "Index questions by (category, id) and (category, difficulty)",
+        _category_indexes,
+        transactional=False,
+    ),
+    Migration(3, "Count questions with statement-level triggers", _statement_count_triggers),
+    Migration(4, "Quiz sessions shared by all workers", _quiz_sessions_table),
+    Migration(
+        5, "Stamp data versions with a clock that never goes back", _monotonic_data_versions
+    ),
+    Migration(
+        6, "Trigram indexes for search on Postgres", _trigram_indexes, transactional=False
+    ),
+)
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(engine: Engine) -> Optional[int]:
+    """The version in the marker row, or None when there is none."""
+    try:
+        with engine.connect() as connection:
+            return connection.execute(select(SchemaVersion.version)).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def stamp(engine: Engine, version: int = SCHEMA_VERSION) -> None:
+    with engine.begin() as connection:
+        connection.execute(delete(SchemaVersion))
+        connection.execute(insert(SchemaVersion).values(version=version))
+
+
+def pending(version: Optional[int]) -> list[Migration]:
+    return [migration for migration in MIGRATIONS if migration.version > (version or 0)]
+
+
+@contextmanager
+def _migration_lock(engine: Engine) -> Iterator[None]:
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        connection.commit()
+        try:
+            yield
+        finally:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY}
+            )
+            connection.commit()
+
+
+def upgrade(engine: Engine) -> list[Migration]:
+    """Bring the schema up to SCHEMA_VERSION. Returns the migrations that ran."""
+    with _migration_lock(engine):
+        fresh = not inspect(engine).has_table(Question.__tablename__)
+        db.metadata.create_all(engine)
+        if fresh:
+            stamp(engine)
+            return []
+
+        version = schema_version(engine)
+        if version is not None and version > SCHEMA_VERSION:
+            logger.warning(
+                "Schema version %d is newer than this app's %d; not migrating.",
+                version,
+                SCHEMA_VERSION,
+            )
+        applied = pending(version)
+        for migration in applied:
+            started = time.perf_counter()
+            if migration.transactional:
+                with engine.begin() as connection:
+                    migration.apply(connection)
+            else:
+                with engine.connect() as connection:
+                    migration.apply(connection.execution_options(isolation_level="AUTOCOMMIT"))
+            stamp(engine, migration.version)
+            logger.info(
+                "Applied migration %d (%s) in %.2fs.",
+                migration.version,
+                migration.description,
+                time.perf_counter() - started,
+            )
+        return applied
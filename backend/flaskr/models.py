@@ -1,25 +1,50 @@
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Sequence
 
 from flask import abort
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Integer, String
+from sqlalchemy import BigInteger, DateTime, Index, Integer, LargeBinary, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .config import ProductionConfig
+from .replicas import DEFAULT_REPLICA_POLICY
+from .replicas import EXTENSION_KEY as REPLICA_ROUTER_KEY
+from .replicas import ReplicaRouter, RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
-def setup_db(app, database_path: Optional[str] = None):
+def setup_db(
+    app,
+    database_path: Optional[str] = None,
+    engine_options: Optional[dict] = None,
+    replica_paths: Sequence[str] = (),
+    replica_policy: str = DEFAULT_REPLICA_POLICY,
+):
     if database_path is None:
-        database_path = ProductionConfig(testing=False).SQLALCHEMY_DATABASE_URI
+        config = ProductionConfig(testing=False).as_app_config()
+        database_path = config["SQLALCHEMY_DATABASE_URI"]
+        engine_options = config["SQLALCHEMY_ENGINE_OPTIONS"]
+        replica_paths = config["SQLALCHEMY_REPLICA_URIS"]
+        replica_policy = config["REPLICA_POLICY"]
     app.config["SQLALCHEMY_DATABASE_URI"] = database_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options or {}
     db.init_app(app)
+    app.extensions[REPLICA_ROUTER_KEY] = ReplicaRouter(
+        replica_paths, engine_options, policy=replica_policy
+    )
 
 
 class Question(db.Model):
     __tablename__ = "questions"
+    # Category pages and the quiz sampler read ids within a category; the
+    # export and bulk filters match category and difficulty. Existing
+    # databases get these from migration 2.
+    __table_args__ = (
+        Index("ix_questions_category_id", "category", "id"),
+        Index("ix_questions_category_difficulty", "category", "difficulty"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     question: Mapped[str] = mapped_column(String, nullable=False)
@@ -54,6 +79,49 @@ class Question(db.Model):
         }
 
 
+class QuestionCount(db.Model):
+    """Number of questions per (category, difficulty), maintained by triggers."""
+
+    __tablename__ = "question_counts"
+
+    category: Mapped[int] = mapped_column(Integer, primary_key=True)
+    difficulty: Mapped[int] = mapped_column(Integer, primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class SchemaVersion(db.Model):
+    """The last migration applied to this database; a single row."""
+
+    __tablename__ = "schema_version"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+
+class DataVersion(db.Model):
+    """Per-table change stamp, bumped by triggers on every write statement."""
+
+    __tablename__ = "data_versions"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class QuizSessionState(db.Model):
+    """A quiz session's category and seen questions, shared by every worker."""
+
+    __tablename__ = "quiz_sessions"
+
+    token: Mapped[str] = mapped_column(String(64), primary_key=True)
+    category_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    seen: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+
 class Category(db.Model):
     __tablename__ = "categories"
 
@@ -133,7 +201,15 @@ class QuestionCreationValidation:
                 "category must be a positive integer", status_code=422
             ) from None
 
-        if not db.session.get(Category, category_id):
+        from .categories import get_category_registry
+
+        registry = get_category_registry()
+        if registry is not None:
+            exists = registry.exists(category_id)
+        else:
+            exists = db.session.get(Category, category_id) is not None
+
+        if not exists:
             raise ValidationError(
                 f"Category with id {category_id} does not exist", status_code=422
             ) from None
@@ -0,0 +1,65 @@
+import base64
+import binascii
+import json
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+from .models import Question
+
+# Sort keys usable for keyset pagination. Each must end in a unique column so
+# that the ordering is total and "rows after the cursor" is well defined.
+# Cursor values are checked to be integers, so every column here must be one.
+SORT_KEYS: dict[str, tuple] = {
+    "id": (Question.id,),
+}
+DEFAULT_SORT = "id"
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    payload = json.dumps({"s": sort, "v": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[str, tuple]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort, values = payload["s"], tuple(payload["v"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise CursorError("cursor is invalid") from None
+
+    columns = SORT_KEYS.get(sort) if isinstance(sort, str) else None
+    if columns is None or len(values) != len(columns):
+        raise CursorError("cursor is invalid")
+    if any(not isinstance(v, int) or isinstance(v, bool) for v in values):
+        raise CursorError("cursor is invalid")
+    return sort, values
+
+
+def order_by(sort: str) -> tuple:
+    return SORT_KEYS[sort]
+
+
+def after(sort: str, values: Sequence[Any]) -> ColumnElement:
+    columns = SORT_KEYS[sort]
+    if len(columns) == 1:
+        return columns[0] > values[0]
+    return tuple_(*columns) > tuple_(*values)
+
+
+def cursor_for(sort: str, row: Any) -> str:
+    return encode_cursor(sort, [getattr(row, c.key) for c in SORT_KEYS[sort]])
+
+
+def split_page(sort: str, rows: list, page_size: int) -> tuple[list, Optional[str]]:
+    """Trim a page fetched with ``limit(page_size + 1)`` and build its next cursor."""
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, cursor_for(sort, rows[-1])
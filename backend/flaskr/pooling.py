@@ -0,0 +1,106 @@
+import threading
+import time
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolStats:
+    """Checkout counters and wait times for one connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_total / waits * 1000, 3) if waits else 0.0,
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times how long each checkout waits for a connection.
+
+    The wait covers queueing for a free connection and opening a new one, so
+    a pool that is too small for the worker's concurrency shows up here
+    before it shows up as pool timeouts.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _create_connection(self):
+        self.stats.count("connects")
+        return super()._create_connection()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        self.stats.count("checkouts")
+        return record
+
+    def _do_return_conn(self, record) -> None:
+        self.stats.count("checkins")
+        super()._do_return_conn(record)
+
+    def _invalidate(self, connection, exception=None, _checkin=True) -> None:
+        self.stats.count("invalidations")
+        super()._invalidate(connection, exception, _checkin)
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """The instrumented pool for async drivers, waiting on an asyncio queue."""
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Current pool occupancy, plus checkout counters when the pool is instrumented."""
+    pool: Pool = engine.pool
+    stats = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(pool.stats.snapshot())
+    return stats
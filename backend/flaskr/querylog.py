@@ -0,0 +1,194 @@
+import logging
+import time
+from collections import Counter
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import (
+    Blueprint,
+    Flask,
+    Response,
+    current_app,
+    g,
+    has_app_context,
+    has_request_context,
+    request,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "query_log"
+
+BUDGET_OFF = "off"
+BUDGET_WARN = "warn"
+BUDGET_RAISE = "raise"
+BUDGET_MODES = (BUDGET_OFF, BUDGET_WARN, BUDGET_RAISE)
+
+# Queries a route may issue unless it declares its own budget.
+DEFAULT_QUERY_BUDGET = 4
+MAX_LOGGED_PARAMETERS = 500
+
+_STATEMENTS = "query_log_statements"
+_BUDGET = "query_budget"
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryLog:
+    """
+    Slow-query logging and per-request query budgets for one app.
+
+    ``slow_query_ms`` of 0 turns the slow-query log off. With ``explain``,
+    slow SELECTs are logged with their plan, which costs one more round-trip
+    for each slow query.
+    """
+
+    def __init__(
+        self,
+        slow_query_ms: int = 0,
+        explain: bool = False,
+        budget_mode: str = BUDGET_WARN,
+        default_budget: int = DEFAULT_QUERY_BUDGET,
+    ):
+        if budget_mode not in BUDGET_MODES:
+            raise ValueError(f"Query budget mode must be one of: {', '.join(BUDGET_MODES)}.")
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.explain = explain
+        self.budget_mode = budget_mode
+        self.default_budget = default_budget
+
+    def check_budget(self, statements: Counter) -> None:
+        issued = sum(statements.values())
+        budget = g.get(_BUDGET, self.default_budget)
+        if self.budget_mode == BUDGET_OFF or issued <= budget:
+            return
+        repeated = "".join(
+            f"\n  {count}x {statement}" for statement, count in statements.most_common()
+        )
+        message = (
+            f"{request.method} {request.path} issued {issued} queries, "
+            f"budget {budget}:{repeated}"
+        )
+        if self.budget_mode == BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+    def log_slow(
+        self, conn, statement: str, parameters, elapsed: float, executemany: bool = False
+    ) -> None:
+        route = f"{request.method} {request.full_path}" if has_request_context() else "-"
+        params = repr(parameters)
+        if len(params) > MAX_LOGGED_PARAMETERS:
+            params = params[:MAX_LOGGED_PARAMETERS] + "..."
+        plan = ""
+        if self.explain and not executemany:
+            plan = explain(conn, statement, parameters)
+            plan = f"\n{plan}" if plan else ""
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s params=%s%s",
+            elapsed * 1000,
+            route,
+            statement,
+            params,
+            plan,
+        )
+
+
+def explain(conn, statement: str, parameters) -> Optional[str]:
+    """The plan for a SELECT that just ran on ``conn``, or None."""
+    if statement.lstrip().split(None, 1)[0].upper() not in ("SELECT", "WITH"):
+        return None
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        prefix = "EXPLAIN "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+    # A separate DBAPI cursor keeps the result of the statement itself
+    # unread, and does not go back through these events.
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    except Exception:
+        logger.debug("Could not explain slow query.", exc_info=True)
+        return None
+    finally:
+        cursor.close()
+
+
+def get_query_log() -> Optional[QueryLog]:
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(EXTENSION_KEY)
+
+
+def query_budget(limit: int) -> Callable:
+    """Let the view issue up to ``limit`` queries instead of the default budget."""
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            setattr(g, _BUDGET, limit)
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def watch(bp: Blueprint) -> None:
+    """Count the queries of every request to ``bp`` against its budget."""
+
+    @bp.before_request
+    def start_counting() -> None:
+        # ``g`` outlives the request when the caller already pushed an app
+        # context, so each request starts from fresh counts.
+        g.pop(_BUDGET, None)
+        query_log = get_query_log()
+        if query_log is not None and query_log.budget_mode != BUDGET_OFF:
+            setattr(g, _STATEMENTS, Counter())
+
+    @bp.after_request
+    def check_budget(response: Response) -> Response:
+        # In raise mode the error response runs this hook again; it is
+        # only checked once.
+        query_log = get_query_log()
+        statements = g.pop(_STATEMENTS, None)
+        if query_log is not None and statements is not None:
+            query_log.check_budget(statements)
+        return response
+
+
+def init_query_log(app: Flask, **options) -> QueryLog:
+    query_log = QueryLog(**options)
+    app.extensions[EXTENSION_KEY] = query_log
+    return query_log
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, context, _executemany):
+    if context is not None:
+        context._query_log_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, _cursor, statement, parameters, context, executemany):
+    query_log = get_query_log()
+    if query_log is None:
+        return
+    if has_request_context():
+        statements = g.get(_STATEMENTS)
+        if statements is not None:
+            statements[statement] += 1
+    started = getattr(context, "_query_log_started", None)
+    if started is None or not query_log.slow_query_seconds:
+        return
+    elapsed = time.perf_counter() - started
+    if elapsed >= query_log.slow_query_seconds:
+        query_log.log_slow(conn, statement, parameters, elapsed, executemany)
@@ -0,0 +1,157 @@
+import secrets
+import struct
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from sqlalchemy import delete, insert, select, update
+
+from .models import QuizSessionState, db
+
+CHUNK_BITS = 1024
+_CHUNK_HEADER = struct.Struct(">Q")
+
+
+class SeenSet:
+    """
+    Sparse bitmap of question ids.
+
+    Ids are grouped into fixed-size chunks and each chunk is a single int
+    bitmap, so a quiz over clustered ids costs a few bytes per question and
+    membership checks never depend on how many questions were seen.
+    """
+
+    __slots__ = ("_chunks", "_count")
+
+    def __init__(self) -> None:
+        self._chunks: dict[int, int] = {}
+        self._count = 0
+
+    def add(self, question_id: int) -> None:
+        chunk, bit = divmod(question_id, CHUNK_BITS)
+        bits = self._chunks.get(chunk, 0)
+        mask = 1 << bit
+        if not bits & mask:
+            self._chunks[chunk] = bits | mask
+            self._count += 1
+
+    def __contains__(self, question_id: object) -> bool:
+        if not isinstance(question_id, int):
+            return False
+        chunk, bit = divmod(question_id, CHUNK_BITS)
+        return bool(self._chunks.get(chunk, 0) >> bit & 1)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def to_bytes(self) -> bytes:
+        """Each chunk's index and bitmap, compressed; unused bits cost next to nothing."""
+        return zlib.compress(
+            b"".join(
+                _CHUNK_HEADER.pack(chunk) + self._chunks[chunk].to_bytes(CHUNK_BITS // 8, "little")
+                for chunk in sorted(self._chunks)
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SeenSet":
+        seen = cls()
+        raw = zlib.decompress(data)
+        step = _CHUNK_HEADER.size + CHUNK_BITS // 8
+        for offset in range(0, len(raw), step):
+            (chunk,) = _CHUNK_HEADER.unpack_from(raw, offset)
+            bits = int.from_bytes(raw[offset + _CHUNK_HEADER.size : offset + step], "little")
+            seen._chunks[chunk] = bits
+            seen._count += bin(bits).count("1")
+        return seen
+
+    def __iter__(self) -> Iterator[int]:
+        for chunk in sorted(self._chunks):
+            bits = self._chunks[chunk]
+            base = chunk * CHUNK_BITS
+            while bits:
+                low = bits & -bits
+                yield base + low.bit_length() - 1
+                bits ^= low
+
+
+class QuizSession:
+    __slots__ = ("token", "category_id", "seen")
+
+    def __init__(self, token: str, category_id: int, seen: Optional[SeenSet] = None) -> None:
+        self.token = token
+        self.category_id = category_id
+        self.seen = seen if seen is not None else SeenSet()
+
+
+class QuizSessionStore:
+    """
+    Quiz sessions in the ``quiz_sessions`` table, with a sliding TTL.
+
+    Any worker can serve any token. Sessions are read and written on the
+    primary, never a replica, so a step always sees the one before it.
+    Expired rows are ignored on read and deleted when new sessions start.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+
+    def _expires_at(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.ttl_seconds)
+
+    def create(self, category_id: int) -> QuizSession:
+        now = datetime.now(timezone.utc)
+        session = QuizSession(secrets.token_urlsafe(24), category_id)
+        with db.engine.begin() as connection:
+            connection.execute(delete(QuizSessionState).where(QuizSessionState.expires_at <= now))
+            connection.execute(
+                insert(QuizSessionState).values(
+                    token=session.token,
+                    category_id=category_id,
+                    seen=session.seen.to_bytes(),
+                    expires_at=self._expires_at(now),
+                )
+            )
+        return session
+
+    @contextmanager
+    def checkout(self, token: str) -> Iterator[Optional[QuizSession]]:
+        """
+        The session for ``token`` (None when unknown or expired), locked for
+        the block and saved with a restarted TTL when the block completes.
+
+        The row is read with SELECT ... FOR UPDATE, so concurrent steps on
+        one token take turns instead of both serving from the same seen set
+        and the last save dropping the other's question. An exception in the
+        block rolls back and leaves the session as it was.
+        """
+        with db.engine.begin() as connection:
+            row = connection.execute(
+                select(QuizSessionState.category_id, QuizSessionState.seen)
+                .where(
+                    QuizSessionState.token == token,
+                    QuizSessionState.expires_at > datetime.now(timezone.utc),
+                )
+                .with_for_update()
+            ).first()
+            if row is None:
+                yield None
+                return
+            session = QuizSession(token, row.category_id, SeenSet.from_bytes(row.seen))
+            yield session
+            connection.execute(
+                update(QuizSessionState)
+                .where(QuizSessionState.token == token)
+                .values(
+                    seen=session.seen.to_bytes(),
+                    expires_at=self._expires_at(datetime.now(timezone.utc)),
+                )
+            )
+
+    def discard(self, token: str) -> bool:
+        with db.engine.begin() as connection:
+            result = connection.execute(
+                delete(QuizSessionState).where(QuizSessionState.token == token)
+            )
+        return result.rowcount > 0
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from .models import Question
+
+QUESTION_COLUMNS = (
+    Question.id,
+    Question.question,
+    Question.answer,
+    Question.category,
+    Question.difficulty,
+)
+
+
+@dataclass
+class QuestionRecord:
+    """
+    Read-only view of a question row.
+
+    Records are built from plain column tuples, so reading them never touches
+    the session identity map or change tracking. The JSON providers serialize
+    them as the same object ``Question.format()`` returns.
+    """
+
+    __slots__ = ("id", "question", "answer", "category", "difficulty")
+
+    id: int
+    question: str
+    answer: str
+    category: int
+    difficulty: int
+
+
+def select_questions(*conditions) -> Select:
+    """Select the columns of a ``QuestionRecord``, filtered by ``conditions``."""
+    return select(*QUESTION_COLUMNS).where(*conditions)
+
+
+def fetch_all(session: Session, stmt: Select) -> list[QuestionRecord]:
+    return [QuestionRecord(*row) for row in session.execute(stmt).tuples()]
+
+
+def fetch_one(session: Session, stmt: Select) -> Optional[QuestionRecord]:
+    row = session.execute(stmt.limit(1)).tuples().first()
+    return QuestionRecord(*row) if row is not None else None
+
+
+def fetch_by_id(session: Session, question_id: int) -> Optional[QuestionRecord]:
+    return fetch_one(session, select_questions(Question.id == question_id))
+
+
+def fetch_by_ids(session: Session, ids: list[int]) -> list[QuestionRecord]:
+    """Return the records for ``ids`` in the order given, skipping missing ids."""
+    if not ids:
+        return []
+    by_id = {
+        record.id: record
+        for record in fetch_all(session, select_questions(Question.id.in_(ids)))
+    }
+    return [by_id[qid] for qid in ids if qid in by_id]
@@ -0,0 +1,235 @@
+import logging
+import random
+import threading
+import time
+from functools import wraps
+from typing import Callable, Optional, Sequence
+
+from flask import current_app, g, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "replica_router"
+
+# A replica that failed a connection is skipped for this long.
+REPLICA_RETRY_SECONDS = 30.0
+
+_READ_ONLY = "db_read_only"
+_WROTE = "replica_wrote"
+_REPLICA = "replica_engine"
+
+
+class Replica:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.reads = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def checked_out(self) -> int:
+        checkedout = getattr(self.engine.pool, "checkedout", None)
+        return checkedout() if checkedout is not None else 0
+
+
+# Balancing policies pick one of the healthy replicas.
+
+
+class RoundRobin:
+    def __init__(self):
+        self._next = 0
+
+    def choose(self, replicas: Sequence[Replica]) -> Replica:
+        self._next = (self._next + 1) % len(replicas)
+        return replicas[self._next]
+
+
+class RandomChoice:
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+
+    def choose(self, replicas: Sequence[Replica]) -> Replica:
+        return self.rng.choice(replicas)
+
+
+class LeastBusy:
+    """Prefer the replica with the fewest connections checked out of its pool."""
+
+    def choose(self, replicas: Sequence[Replica]) -> Replica:
+        return min(replicas, key=Replica.checked_out)
+
+
+POLICIES: dict[str, Callable[[], object]] = {
+    "round_robin": RoundRobin,
+    "random": RandomChoice,
+    "least_busy": LeastBusy,
+}
+DEFAULT_REPLICA_POLICY = "round_robin"
+
+
+class ReplicaRouter:
+    """
+    Hands out replica engines for read-only requests.
+
+    Replicas that fail to connect are marked down for
+    ``REPLICA_RETRY_SECONDS``; while every replica is down, reads go to the
+    primary.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        engine_options: Optional[dict] = None,
+        policy: str = DEFAULT_REPLICA_POLICY,
+        retry_seconds: float = REPLICA_RETRY_SECONDS,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Replica policy must be one of: {', '.join(POLICIES)}.")
+        self.policy_name = policy
+        self.policy = POLICIES[policy]()
+        self.retry_seconds = retry_seconds
+        self.primary_fallbacks = 0
+        self._lock = threading.Lock()
+        self.replicas = [
+            Replica(create_engine(url, **(engine_options or {}))) for url in urls
+        ]
+        for replica in self.replicas:
+            event.listen(replica.engine, "handle_error", self._on_error(replica))
+
+    def _on_error(self, replica: Replica) -> Callable:
+        def handle_error(context) -> None:
+            if context.is_disconnect:
+                self.mark_down(replica)
+
+        return handle_error
+
+    def mark_down(self, replica: Replica) -> None:
+        with self._lock:
+            replica.failures += 1
+            replica.down_until = time.monotonic() + self.retry_seconds
+        logger.warning("Replica %s marked down for %.0fs.", replica.name, self.retry_seconds)
+
+    def choose(self) -> Optional[Replica]:
+        now = time.monotonic()
+        with self._lock:
+            healthy = [r for r in self.replicas if r.healthy(now)]
+            if not healthy:
+                self.primary_fallbacks += 1
+                return None
+            return self.policy.choose(healthy)
+
+    def engine_for_read(self) -> Optional[Engine]:
+        """
+        Pick a replica and check that it accepts a connection, trying the
+        others before giving up. Returns None when reads should use the primary.
+        """
+        for _ in range(len(self.replicas)):
+            replica = self.choose()
+            if replica is None:
+                return None
+            try:
+                replica.engine.connect().close()
+            except DBAPIError:
+                self.mark_down(replica)
+                continue
+            with self._lock:
+                replica.reads += 1
+            return replica.engine
+        with self._lock:
+            self.primary_fallbacks += 1
+        return None
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "policy": self.policy_name,
+            "primary_fallbacks": self.primary_fallbacks,
+            "replicas": [
+                {
+                    "url": r.name,
+                    "healthy": r.healthy(now),
+                    "reads": r.reads,
+                    "failures": r.failures,
+                }
+                for r in self.replicas
+            ],
+        }
+
+
+def get_replica_router() -> Optional[ReplicaRouter]:
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(EXTENSION_KEY)
+
+
+def read_only(view: Callable) -> Callable:
+    """Let the view's SELECTs run on a replica."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.setdefault(_READ_ONLY, True)
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def read_engine() -> Optional[Engine]:
+    """The replica engine for Core reads outside the session, if any."""
+    router = get_replica_router()
+    if router is None or not router.replicas or not g.get(_READ_ONLY, False):
+        return None
+    return router.engine_for_read()
+
+
+class RoutingSession(FlaskSession):
+    """
+    Session that sends SELECTs from read-only requests to a replica.
+
+    One replica is chosen per session, so a request reads one consistent
+    snapshot. Once the session writes anything it stays on the primary,
+    so a request always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and clause is not None
+            and getattr(clause, "is_select", False)
+            and not self._flushing
+            and not self.info.get(_WROTE)
+            and has_request_context()
+            and g.get(_READ_ONLY, False)
+        ):
+            if _REPLICA not in self.info:
+                router = get_replica_router()
+                self.info[_REPLICA] = (
+                    router.engine_for_read() if router is not None and router.replicas else None
+                )
+            if self.info[_REPLICA] is not None:
+                return self.info[_REPLICA]
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _flushed(session, _flush_context) -> None:
+    session.info[_WROTE] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _executed(orm_execute_state) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[_WROTE] = True
@@ -0,0 +1,103 @@
+import random
+from typing import Collection, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import Question, QuestionCount
+from .reads import QuestionRecord, fetch_by_ids
+
+ALL_CATEGORIES = 0
+
+
+class QuestionSampler:
+    """
+    Picks random eligible questions without loading the candidate set.
+
+    The eligible rows are counted, from the trigger-maintained
+    ``question_counts`` less the excluded ids that fall in the category, and
+    positions are drawn uniformly below that count. The ids at those
+    positions are read in one pass over the (category, id) index, so every
+    eligible question is equally likely however the ids are spread.
+    """
+
+    def __init__(self, session: Session, rng: Optional[random.Random] = None):
+        self.session = session
+        self.rng = rng or random.Random()
+
+    def _category_filter(self, category_id: int) -> list:
+        if category_id == ALL_CATEGORIES:
+            return []
+        return [Question.category == category_id]
+
+    def _eligible(self, category_id: int, exclude: set[int]) -> int:
+        """The number of eligible questions, without scanning the category."""
+        total = select(func.coalesce(func.sum(QuestionCount.total), 0))
+        if category_id != ALL_CATEGORIES:
+            total = total.where(QuestionCount.category == category_id)
+        stmt = select(total.scalar_subquery())
+        if exclude:
+            excluded = (
+                select(func.count())
+                .select_from(Question)
+                .where(*self._category_filter(category_id), Question.id.in_(list(exclude)))
+            )
+            stmt = select(total.scalar_subquery() - excluded.scalar_subquery())
+        return self.session.execute(stmt).scalar_one()
+
+    def _count_eligible(self, conditions: list) -> int:
+        return self.session.execute(
+            select(func.count()).select_from(Question).where(*conditions)
+        ).scalar_one()
+
+    def _ids_at(self, conditions: list, positions: list[int]) -> list[int]:
+        """The eligible ids at ``positions`` (0-based, in id order), in one query."""
+        numbered = (
+            select(Question.id, func.row_number().over(order_by=Question.id).label("position"))
+            .where(*conditions)
+            .order_by(Question.id)
+            .limit(max(positions) + 1)
+            .subquery()
+        )
+        by_position = dict(
+            self.session.execute(
+                select(numbered.c.position, numbered.c.id).where(
+                    numbered.c.position.in_([position + 1 for position in positions])
+                )
+            ).tuples().all()
+        )
+        return [by_position[p + 1] for p in positions if p + 1 in by_position]
+
+    def _draw(self, conditions: list, eligible: int, count: int) -> list[int]:
+        if eligible <= 0:
+            return []
+        return self._ids_at(conditions, self.rng.sample(range(eligible), min(count, eligible)))
+
+    def sample(
+        self, category_id: int, exclude: Collection[int] = ()
+    ) -> Optional[QuestionRecord]:
+        questions = self.sample_many(category_id, 1, exclude)
+        return questions[0] if questions else None
+
+    def sample_many(
+        self, category_id: int, count: int, exclude: Collection[int] = ()
+    ) -> list[QuestionRecord]:
+        """
+        Up to ``count`` distinct eligible questions, in random order.
+
+        Three queries: the eligible count, the ids at the drawn positions and
+        their records. When the counters run ahead of the table (a write
+        committed between the two reads), positions past the end find no
+        row; the rows are then counted exactly and the draw is repeated, for
+        five queries at most.
+        """
+        exclude = set(exclude)
+        conditions = self._category_filter(category_id)
+        if exclude:
+            conditions.append(~Question.id.in_(list(exclude)))
+
+        eligible = self._eligible(category_id, exclude)
+        chosen = self._draw(conditions, eligible, count)
+        if len(chosen) < min(count, eligible):
+            chosen = self._draw(conditions, self._count_eligible(conditions), count)
+        return fetch_by_ids(self.session, chosen)
@@ -0,0 +1,349 @@
+import logging
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, event, func, or_, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, object_session
+
+from .models import Question
+from .reads import QuestionRecord, fetch_all, fetch_by_ids, select_questions
+
+logger = logging.getLogger(__name__)
+
+LIKE_ESCAPE = "\\"
+
+# GIN indexes for TrigramSearch, as (name, column). Built by a migration on
+# existing databases and right after the table on new ones.
+TRIGRAM_INDEXES = (
+    ("ix_questions_question_trgm", "question"),
+    ("ix_questions_answer_trgm", "answer"),
+)
+
+
+def escape_like(term: str) -> str:
+    return (
+        term.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+
+
+def trigrams(value: str) -> set[str]:
+    return {value[i : i + 3] for i in range(len(value) - 2)}
+
+
+class SearchBackend(ABC):
+    name: str
+
+    @abstractmethod
+    def search(
+        self,
+        session: Session,
+        term: str,
+        include_answers: bool = False,
+        *,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> list[QuestionRecord]:
+        """
+        Return questions containing ``term`` (case-insensitive), best match
+        first. When ``after_id`` is given, return matches with a larger id in
+        id order instead, for keyset pagination.
+        """
+
+    def invalidate(self) -> None:
+        """Forget cached state after writes that bypass the ORM."""
+
+    def warm(self, session: Session) -> None:
+        """Load cached state now rather than on the first search."""
+
+    @abstractmethod
+    def count(self, session: Session, term: str, include_answers: bool = False) -> int:
+        """Return how many questions ``search`` would match without a limit."""
+
+
+class LikeSearch(SearchBackend):
+    """
+    Escaped ``ILIKE '%term%'`` against the database, for Postgres without
+    pg_trgm. Every search scans the questions table, but it always sees the
+    latest committed data, whichever worker wrote it. Shorter questions rank
+    first, as they do in the in-process index.
+    """
+
+    name = "ilike"
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def _condition(self, term: str, include_answers: bool):
+        pattern = f"%{escape_like(term)}%"
+        condition = Question.question.ilike(pattern, escape=LIKE_ESCAPE)
+        if include_answers:
+            condition = or_(condition, Question.answer.ilike(pattern, escape=LIKE_ESCAPE))
+        return condition
+
+    def _rank(self, term: str, include_answers: bool) -> list:
+        return [func.length(Question.question)]
+
+    def search(
+        self,
+        session: Session,
+        term: str,
+        include_answers: bool = False,
+        *,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> list[QuestionRecord]:
+        stmt = select_questions(self._condition(term, include_answers))
+        if after_id is not None:
+            stmt = stmt.where(Question.id > after_id).order_by(Question.id)
+        else:
+            stmt = stmt.order_by(*self._rank(term, include_answers), Question.id).offset(offset)
+        return fetch_all(session, stmt.limit(limit))
+
+    def count(self, session: Session, term: str, include_answers: bool = False) -> int:
+        return session.execute(
+            select(func.count(Question.id)).where(self._condition(term, include_answers))
+        ).scalar_one()
+
+
+class TrigramSearch(LikeSearch):
+    """
+    Postgres search backed by pg_trgm GIN indexes.
+
+    The indexes let ``ILIKE '%term%'`` use an index scan, and Postgres keeps
+    them current on every insert, update and delete. Matches are ranked by
+    ``word_similarity`` so the closest hits come first.
+    """
+
+    name = "pg_trgm"
+
+    def installed(self) -> bool:
+        """Whether migrations built both indexes; nothing is created here."""
+        try:
+            with self.engine.connect() as conn:
+                found = conn.execute(
+                    text(
+                        "SELECT count(*) FROM pg_index "
+                        "JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+                        "WHERE pg_class.relname IN :names AND pg_index.indisvalid"
+                    ).bindparams(bindparam("names", expanding=True)),
+                    {"names": [name for name, _ in TRIGRAM_INDEXES]},
+                ).scalar_one()
+        except SQLAlchemyError as e:
+            logger.warning("pg_trgm search unavailable: %s", e.__class__.__name__)
+            return False
+        return found == len(TRIGRAM_INDEXES)
+
+    def _rank(self, term: str, include_answers: bool) -> list:
+        rank = func.word_similarity(term, Question.question)
+        if include_answers:
+            rank = func.greatest(rank, func.word_similarity(term, Question.answer))
+        return [rank.desc()]
+
+
+class InMemorySearchIndex(SearchBackend):
+    """
+    In-process trigram index for SQLite and other dev/test databases. Each
+    worker has its own copy, so it is never used on Postgres.
+
+    Built lazily from the table on first use and kept in sync with ORM
+    inserts, updates and deletes once their transaction commits. Writes made
+    outside this process (or with bulk SQL) are only seen after
+    ``invalidate()``.
+    """
+
+    name = "in_memory"
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = threading.RLock()
+        self._docs: dict[int, tuple[str, str]] = {}
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        self._loaded = False
+        self._generation = 0
+        _indexes.add(self)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._loaded = False
+            self._generation += 1
+
+    def _load(self, session: Session) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            generation = self._generation
+
+        # Read outside the lock: in ASGI mode requests share one thread, and
+        # the RLock would let a second request in mid-build.
+        rows = session.execute(select(Question.id, Question.question, Question.answer)).all()
+        with self._lock:
+            if self._loaded:
+                return
+            self._docs.clear()
+            self._postings.clear()
+            for qid, question, answer in rows:
+                self._add(qid, question, answer)
+            # Changes committed during the read may be missing; if any were,
+            # serve this build once and rebuild on the next search.
+            self._loaded = generation == self._generation
+
+    def warm(self, session: Session) -> None:
+        self._load(session)
+
+    def _add(self, qid: int, question: str, answer: str) -> None:
+        doc = (question.lower(), answer.lower())
+        self._docs[qid] = doc
+        for gram in trigrams(doc[0]) | trigrams(doc[1]):
+            self._postings[gram].add(qid)
+
+    def _remove(self, qid: int) -> None:
+        doc = self._docs.pop(qid, None)
+        if doc is None:
+            return
+        for gram in trigrams(doc[0]) | trigrams(doc[1]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(qid)
+                if not ids:
+                    del self._postings[gram]
+
+    def apply(self, changes: dict[int, Optional[tuple[str, str]]]) -> None:
+        with self._lock:
+            if not self._loaded:
+                self._generation += 1
+                return
+            for qid, doc in changes.items():
+                self._remove(qid)
+                if doc is not None:
+                    self._add(qid, *doc)
+
+    def _candidates(self, needle: str) -> Iterable[int]:
+        grams = trigrams(needle)
+        if not grams:
+            return list(self._docs)
+        postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+        return set.intersection(*postings)
+
+    def _matches(self, session: Session, term: str, include_answers: bool) -> list:
+        needle = term.lower()
+        self._load(session)
+        with self._lock:
+            ranked = []
+            for qid in self._candidates(needle):
+                question, answer = self._docs[qid]
+                text_ = question
+                position = question.find(needle)
+                if position < 0 and include_answers:
+                    text_ = answer
+                    position = answer.find(needle)
+                if position >= 0:
+                    ranked.append((-len(needle) / len(text_), position, qid))
+        return ranked
+
+    def search(
+        self,
+        session: Session,
+        term: str,
+        include_answers: bool = False,
+        *,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> list[QuestionRecord]:
+        ranked = self._matches(session, term, include_answers)
+        if after_id is not None:
+            order = sorted(qid for _, _, qid in ranked if qid > after_id)
+        else:
+            order = [qid for _, _, qid in sorted(ranked)][offset:]
+        return fetch_by_ids(session, order[:limit])
+
+    def count(self, session: Session, term: str, include_answers: bool = False) -> int:
+        return len(self._matches(session, term, include_answers))
+
+
+@event.listens_for(Question.__table__, "after_create")
+def _index_new_table(_table, connection: Connection, **_kw) -> None:
+    # The table is empty, so a plain build inside create_all is instant.
+    if connection.dialect.name != "postgresql":
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except SQLAlchemyError as e:
+        logger.warning("pg_trgm search unavailable: %s", e.__class__.__name__)
+        return
+    for name, column in TRIGRAM_INDEXES:
+        connection.execute(
+            text(
+                f"CREATE INDEX {name} ON {Question.__tablename__} "
+                f"USING gin ({column} gin_trgm_ops)"
+            )
+        )
+
+
+def create_search_backend(engine: Engine) -> SearchBackend:
+    """
+    Trigram search on Postgres when its indexes exist, or plain ILIKE; the
+    in-process index elsewhere.
+    """
+    if engine.dialect.name == "postgresql":
+        backend = TrigramSearch(engine)
+        if backend.installed():
+            return backend
+        # Not the in-process index: other workers' writes would never reach it.
+        logger.warning("Falling back to unindexed ILIKE search.")
+        return LikeSearch(engine)
+    return InMemorySearchIndex(engine)
+
+
+# Keep in-process indexes in sync with ORM writes. Changes are collected per
+# engine at flush time and only applied once the transaction commits.
+
+_indexes: "weakref.WeakSet[InMemorySearchIndex]" = weakref.WeakSet()
+_PENDING = "search_index_changes"
+
+
+def _record(connection, target: Question, doc: Optional[tuple[str, str]]) -> None:
+    session = object_session(target)
+    if session is None or not _indexes:
+        return
+    pending = session.info.setdefault(_PENDING, {})
+    pending.setdefault(connection.engine, {})[target.id] = doc
+
+
+@event.listens_for(Question, "after_insert")
+@event.listens_for(Question, "after_update")
+def _question_saved(_mapper, connection, target: Question) -> None:
+    _record(connection, target, (target.question, target.answer))
+
+
+@event.listens_for(Question, "after_delete")
+def _question_deleted(_mapper, connection, target: Question) -> None:
+    _record(connection, target, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    for index in list(_indexes):
+        changes = pending.get(index.engine)
+        if changes:
+            index.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,99 @@
+import dataclasses
+import json
+from typing import Any, Optional, Union
+
+from flask import Flask, Response, current_app
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+# "auto" picks orjson when it is installed and the stdlib encoder otherwise.
+JSON_BACKEND = "auto"
+JSON_BACKENDS = ("auto", "orjson", "stdlib")
+
+
+def _row_default(o: Any) -> Any:
+    # Rows from column selects go straight to the encoder; no per-row dict
+    # is built in the view.
+    if isinstance(o, Row):
+        return o._asdict()
+    # Slotted dataclasses (read records) skip the deep copy of asdict().
+    slots = getattr(type(o), "__slots__", None)
+    if slots is not None and dataclasses.is_dataclass(o):
+        return {name: getattr(o, name) for name in slots}
+    # Flask's documented fallbacks: dates, Decimal, UUID, dataclasses, __html__.
+    return DefaultJSONProvider.default(o)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's stdlib provider, taught to serialize SQLAlchemy rows."""
+
+    name = "stdlib"
+    default = staticmethod(_row_default)
+
+    def dumpb(self, obj: Any) -> bytes:
+        return json.dumps(
+            obj,
+            default=self.default,
+            ensure_ascii=self.ensure_ascii,
+            sort_keys=self.sort_keys,
+            separators=(",", ":"),
+        ).encode()
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """
+    orjson-backed provider. Responses are encoded straight to bytes in C,
+    with the same output types as the stdlib provider: dates still go through
+    Flask's HTTP date format and integer dict keys become strings.
+    """
+
+    name = "orjson"
+
+    def _options(self) -> int:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumpb(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._options())
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumpb(obj).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if (self.compact is None and current_app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        # Same argument rules as jsonify().
+        if args and kwargs:
+            raise TypeError("app.json.response() takes either args or kwargs, not both")
+        obj = args[0] if len(args) == 1 else args or kwargs or None
+        return current_app.response_class(self.dumpb(obj) + b"\n", mimetype=self.mimetype)
+
+
+def provider_class(backend: Optional[str] = None) -> type[StdlibJSONProvider]:
+    backend = backend or JSON_BACKEND
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"JSON_BACKEND must be one of: {', '.join(JSON_BACKENDS)}.")
+    if backend == "orjson" and orjson is None:
+        raise ValueError("JSON_BACKEND is orjson but orjson is not installed.")
+    if backend == "stdlib" or orjson is None:
+        return StdlibJSONProvider
+    return OrjsonProvider
+
+
+def init_json(app: Flask, backend: Optional[str] = None) -> StdlibJSONProvider:
+    app.json = provider_class(backend)(app)
+    return app.json
@@ -0,0 +1,118 @@
+"""
+Work ``create_app`` does before the app serves its first request.
+
+By default every start runs ``migrations.upgrade``, whose ``create_all``
+checks each table against the database. With ``schema_check="version"`` a
+start reads one marker row instead and only upgrades when the marker is
+behind ``SCHEMA_VERSION``; ``"skip"`` leaves the schema to deploy tooling.
+Prewarming opens pooled connections and loads the in-process caches, so the
+first requests after a deploy do not pay for them.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from flask import Flask
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from .categories import EXTENSION_KEY as CATEGORY_REGISTRY_KEY
+from .conditional import EXTENSION_KEY as DATA_VERSIONS_KEY
+from .migrations import SCHEMA_VERSION, schema_version, upgrade
+from .models import db
+from .search import SearchBackend
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "startup"
+
+SCHEMA_CREATE = "create"
+SCHEMA_VERSION_CHECK = "version"
+SCHEMA_SKIP = "skip"
+SCHEMA_CHECKS = (SCHEMA_CREATE, SCHEMA_VERSION_CHECK, SCHEMA_SKIP)
+
+
+class StartupTimer:
+    """Seconds spent in each startup phase, plus the total once finished."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - started
+
+    def finish(self) -> None:
+        self.phases["total"] = time.perf_counter() - self.started
+        logger.info(
+            "App ready in %.3fs (%s).",
+            self.phases["total"],
+            ", ".join(
+                f"{name} {seconds:.3f}s"
+                for name, seconds in self.phases.items()
+                if name != "total"
+            ),
+        )
+
+
+def ensure_schema(schema_check: str = SCHEMA_CREATE) -> bool:
+    """
+    Create missing tables and apply migrations as ``schema_check`` asks.
+    Returns True when the schema was upgraded.
+    """
+    if schema_check not in SCHEMA_CHECKS:
+        raise ValueError(f"Schema check must be one of: {', '.join(SCHEMA_CHECKS)}.")
+    if schema_check == SCHEMA_SKIP:
+        return False
+    if schema_check == SCHEMA_VERSION_CHECK:
+        found = schema_version(db.engine)
+        if found == SCHEMA_VERSION:
+            return False
+        logger.info("Schema version is %s, expected %s; upgrading.", found, SCHEMA_VERSION)
+    upgrade(db.engine)
+    return True
+
+
+def prewarm_pool(engine: Engine, connections: int) -> int:
+    """
+    Open up to ``connections`` connections and return them to the pool.
+    Returns how many were opened.
+    """
+    size = getattr(engine.pool, "size", None)
+    if callable(size):
+        connections = min(connections, size())
+    opened = []
+    try:
+        # Hold them all at once, or the pool would hand back the same one.
+        for _ in range(connections):
+            opened.append(engine.connect())
+    except SQLAlchemyError as e:
+        logger.warning(
+            "Prewarmed %d of %d connections: %s", len(opened), connections, e.__class__.__name__
+        )
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
+
+
+def prewarm_caches(app: Flask, search_backend: Optional[SearchBackend] = None) -> None:
+    """Load the category and data version caches, and the search index if given."""
+    with app.app_context():
+        try:
+            app.extensions[CATEGORY_REGISTRY_KEY].all()
+            app.extensions[DATA_VERSIONS_KEY].current()
+            if search_backend is not None:
+                search_backend.warm(db.session)
+        except SQLAlchemyError as e:
+            # Cold caches only cost the first requests; they still start.
+            logger.warning("Could not prewarm caches: %s", e.__class__.__name__)
+        finally:
+            db.session.remove()
@@ -0,0 +1,158 @@
+"""
+Synthetic question banks for benchmarks and capacity planning.
+
+    flask --app flaskr generate-questions --count 1000000 --seed 7
+
+The same seed and options always produce the same questions.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+
+from . import bulk
+from .models import Category
+
+DEFAULT_CATEGORIES = ("Science", "Art", "Geography", "History", "Entertainment", "Sports")
+DIFFICULTIES = (1, 2, 3, 4, 5)
+# Most questions are of middling difficulty.
+DEFAULT_DIFFICULTY_WEIGHTS = (10, 25, 30, 25, 10)
+GENERATE_CHUNK_SIZE = 10_000
+
+QUESTION_OPENERS = (
+    "Which",
+    "What",
+    "Who",
+    "Where",
+    "When",
+    "How many",
+    "In which year did",
+    "Name the",
+)
+WORDS = (
+    "ancient", "atlas", "battle", "bridge", "canvas", "capital", "castle", "century",
+    "champion", "chemical", "city", "coast", "comet", "composer", "continent", "crown",
+    "desert", "dynasty", "element", "empire", "engine", "equation", "festival", "film",
+    "forest", "fossil", "galaxy", "glacier", "goal", "harbor", "island", "journey",
+    "kingdom", "lake", "language", "league", "legend", "library", "machine", "marathon",
+    "melody", "metal", "monument", "moon", "mountain", "museum", "nation", "novel",
+    "ocean", "opera", "orbit", "painter", "palace", "planet", "poem", "portrait",
+    "prize", "queen", "record", "republic", "revolution", "river", "season", "sculpture",
+    "signal", "song", "species", "stadium", "star", "storm", "symphony", "temple",
+    "theory", "tournament", "treaty", "valley", "village", "volcano", "voyage", "war",
+)
+
+
+@dataclass(frozen=True)
+class LengthDistribution:
+    """Word counts drawn from a normal distribution, clamped to [minimum, maximum]."""
+
+    mean: float
+    stddev: float
+    minimum: int = 1
+    maximum: int = 60
+
+    @classmethod
+    def parse(cls, text: str, minimum: int = 1) -> "LengthDistribution":
+        """Parse ``MEAN`` or ``MEAN:STDDEV``, in words."""
+        mean, _, stddev = text.partition(":")
+        try:
+            distribution = cls(float(mean), float(stddev or 0), minimum=minimum)
+        except ValueError:
+            raise ValueError(f"Expected MEAN or MEAN:STDDEV, got {text!r}.")
+        if distribution.mean < minimum or distribution.stddev < 0:
+            raise ValueError(f"Mean must be at least {minimum} and stddev at least 0.")
+        return distribution
+
+    def draw(self, rng: random.Random) -> int:
+        words = round(rng.gauss(self.mean, self.stddev)) if self.stddev else round(self.mean)
+        return max(self.minimum, min(self.maximum, words))
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    categories: Sequence[str] = DEFAULT_CATEGORIES
+    category_weights: Optional[Sequence[float]] = None
+    difficulty_weights: Sequence[float] = DEFAULT_DIFFICULTY_WEIGHTS
+    question_words: LengthDistribution = field(
+        default_factory=lambda: LengthDistribution(8, 3, minimum=2)
+    )
+    answer_words: LengthDistribution = field(
+        default_factory=lambda: LengthDistribution(2, 1, minimum=1)
+    )
+
+    def __post_init__(self):
+        if not self.categories:
+            raise ValueError("At least one category is required.")
+        if self.category_weights is not None and len(self.category_weights) != len(
+            self.categories
+        ):
+            raise ValueError("Give one category weight per category.")
+        if len(self.difficulty_weights) != len(DIFFICULTIES):
+            raise ValueError(f"Give {len(DIFFICULTIES)} difficulty weights, for 1 to 5.")
+
+
+def generate_rows(
+    spec: DatasetSpec, category_ids: Sequence[int], count: int, seed: int
+) -> Iterator[dict]:
+    """
+    Yield ``count`` question rows. ``category_ids`` line up with
+    ``spec.categories``.
+    """
+    rng = random.Random(seed)
+    # Draw categories and difficulties a chunk at a time; random.choices
+    # with weights is much cheaper per item in bulk.
+    for start in range(0, count, GENERATE_CHUNK_SIZE):
+        n = min(GENERATE_CHUNK_SIZE, count - start)
+        categories = rng.choices(category_ids, weights=spec.category_weights, k=n)
+        difficulties = rng.choices(DIFFICULTIES, weights=spec.difficulty_weights, k=n)
+        for i in range(n):
+            words = rng.choices(WORDS, k=spec.question_words.draw(rng))
+            answer = rng.choices(WORDS, k=spec.answer_words.draw(rng))
+            yield {
+                "question": f"{rng.choice(QUESTION_OPENERS)} {' '.join(words)} #{start + i + 1}?",
+                "answer": " ".join(answer).capitalize(),
+                "category": categories[i],
+                "difficulty": difficulties[i],
+            }
+
+
+def ensure_categories(engine: Engine, names: Sequence[str]) -> list[int]:
+    """Ids of the named categories, creating the ones that do not exist."""
+    with engine.begin() as connection:
+        existing = {
+            type_: cid for cid, type_ in connection.execute(select(Category.id, Category.type))
+        }
+        missing = [name for name in dict.fromkeys(names) if name not in existing]
+        if missing:
+            connection.execute(insert(Category.__table__), [{"type": name} for name in missing])
+            existing = {
+                type_: cid
+                for cid, type_ in connection.execute(select(Category.id, Category.type))
+            }
+    return [existing[name] for name in names]
+
+
+def load(
+    engine: Engine,
+    spec: DatasetSpec,
+    count: int,
+    seed: int,
+    chunk_size: int = GENERATE_CHUNK_SIZE,
+) -> tuple[int, float]:
+    """
+    Generate and insert ``count`` questions, one transaction per chunk.
+    Returns the number inserted and the seconds it took.
+    """
+    start = time.perf_counter()
+    category_ids = ensure_categories(engine, spec.categories)
+    inserted = 0
+    for chunk in bulk.chunked(generate_rows(spec, category_ids, count, seed), chunk_size):
+        with engine.begin() as connection:
+            bulk.insert_rows(connection, chunk)
+        inserted += len(chunk)
+    return inserted, time.perf_counter() - start
@@ -0,0 +1,4 @@
+#!/usr/bin/env bash
+# This script is used to run the app in ASGI mode (asyncpg + uvicorn) in a local environment.
+echo "Running ASGI app"
+uv run --extra async uvicorn flaskr.asgi:app --host 0.0.0.0 --port 5000
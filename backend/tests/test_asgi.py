@@ -0,0 +1,139 @@
+import asyncio
+import unittest
+from http import HTTPStatus
+
+from sqlalchemy.util import await_only, greenlet_spawn
+from werkzeug.test import Client
+
+import test_flaskr
+from flaskr.asgi import async_database_uri, create_asgi_app
+from flaskr.config import AppTestingConfig
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+
+def wsgi_over_asgi(asgi_app):
+    """
+    Let werkzeug's test client drive an ASGI app. Must be called from a
+    greenlet started by ``greenlet_spawn``, where ``await_only`` works.
+    """
+
+    def app(environ, start_response):
+        headers = [
+            (name[5:].replace("_", "-").lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in environ.items()
+            if name.startswith("HTTP_")
+        ]
+        for name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            if environ.get(name):
+                headers.append((name.replace("_", "-").lower().encode(), environ[name].encode()))
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": environ["REQUEST_METHOD"],
+            "scheme": environ["wsgi.url_scheme"],
+            "path": environ["PATH_INFO"].encode("latin-1").decode(),
+            "root_path": "",
+            "query_string": environ["QUERY_STRING"].encode("latin-1"),
+            "headers": headers,
+            "server": (environ["SERVER_NAME"], int(environ["SERVER_PORT"])),
+            "client": ("127.0.0.1", 0),
+        }
+        body = environ["wsgi.input"].read()
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        await_only(asgi_app(scope, receive, send))
+        status = messages[0]["status"]
+        start_response(
+            f"{status} {HTTPStatus(status).phrase}",
+            [(k.decode("latin-1"), v.decode("latin-1")) for k, v in messages[0]["headers"]],
+        )
+        return [message.get("body", b"") for message in messages[1:]]
+
+    return app
+
+
+@unittest.skipIf(asyncpg is None, "asyncpg is not installed")
+class AsgiTriviaTestCase(test_flaskr.TriviaTestCase):
+    """Runs every TriviaTestCase test against the ASGI app on asyncpg."""
+
+    def setUp(self):
+        super().setUp()
+        database_uri = async_database_uri(self.database_path)
+        config = AppTestingConfig(testing=True)
+        self.asgi = create_asgi_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": database_uri,
+                "SQLALCHEMY_ENGINE_OPTIONS": config.engine_options(database_uri),
+                "QUERY_LOG_OPTIONS": config.QUERY_LOG_OPTIONS,
+            }
+        )
+        self.app = await_only(self.asgi.startup())
+        self.client = Client(wsgi_over_asgi(self.asgi), self.app.test_client().response_wrapper)
+
+    def tearDown(self):
+        super().tearDown()
+        await_only(self.asgi.shutdown())
+
+    # Each step runs in a greenlet on one event loop, so both the ASGI app
+    # and direct database access in the tests can await asyncpg.
+
+    def _run(self, fn, *args):
+        return self._loop.run_until_complete(greenlet_spawn(fn, *args))
+
+    def _callSetUp(self):
+        self._loop = asyncio.new_event_loop()
+        self._run(self.setUp)
+
+    def _callTestMethod(self, method):
+        self._run(method)
+
+    def _callTearDown(self):
+        try:
+            self._run(self.tearDown)
+        finally:
+            self._loop.close()
+
+    def test_get_stats_reports_pool(self):
+        self.client.get(self.api("/questions"))
+        pool = self.client.get(self.api("/stats")).get_json()["pool"]
+
+        self.assertEqual(pool["class"], "InstrumentedAsyncQueuePool")
+        self.assertGreaterEqual(pool["checkouts"], 1)
+
+    def test_concurrent_requests_share_one_thread(self):
+        async def fetch(path):
+            messages = []
+
+            async def receive():
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                messages.append(message)
+
+            scope = {
+                "type": "http",
+                "method": "GET",
+                "path": path,
+                "query_string": b"",
+                "headers": [],
+            }
+            await self.asgi(scope, receive, send)
+            return messages[0]["status"]
+
+        async def fetch_all():
+            paths = [self.api("/questions"), self.api("/categories/4/questions")] * 5
+            return await asyncio.gather(*(fetch(path) for path in paths))
+
+        statuses = await_only(fetch_all())
+        self.assertEqual(statuses, [200] * 10)
+
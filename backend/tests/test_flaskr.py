@@ -1,14 +1,41 @@
+import csv
+import datetime
+import decimal
+import gzip
+import io
+import json
 import logging
+import os
+import random
+import threading
 import unittest
 import subprocess
+import uuid
+from collections import Counter
 from pathlib import Path
 from typing import Optional
+from unittest import mock
 
-from sqlalchemy import text
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
 
 from flaskr import create_app
+from flaskr import compression
+from flaskr.admission import EXTENSION_KEY as ADMISSION_KEY
 from flaskr.config import AppTestingConfig
+from flaskr.categories import EXTENSION_KEY as CATEGORY_REGISTRY_KEY
+from flaskr.migrations import SCHEMA_VERSION, schema_version
 from flaskr.models import Category, Question, db
+from flaskr.pagination import encode_cursor
+from flaskr.querylog import QueryBudgetExceeded
+from flaskr.quiz_sessions import SeenSet
+from flaskr.reads import QuestionRecord, fetch_all, select_questions
+from flaskr.replicas import read_only
+from flaskr.sampling import QuestionSampler
+from flaskr.search import TRIGRAM_INDEXES, create_search_backend
+from flaskr.startup import ensure_schema
+from flaskr.synthetic import DatasetSpec, generate_rows
 
 log = logging.getLogger("tests.compose")
 
@@ -47,11 +74,14 @@ class TriviaTestCase(unittest.TestCase):
         """Define test variables and initialize app."""
         self.API_PREFIX = "/api/v1"
 
-        self.database_path: str = AppTestingConfig(testing=True).SQLALCHEMY_DATABASE_URI
+        config = AppTestingConfig(testing=True)
+        self.database_path: str = config.SQLALCHEMY_DATABASE_URI
 
         self.app = create_app(
             {
                 "SQLALCHEMY_DATABASE_URI": self.database_path,
+                "SQLALCHEMY_ENGINE_OPTIONS": config.SQLALCHEMY_ENGINE_OPTIONS,
+                "QUERY_LOG_OPTIONS": config.QUERY_LOG_OPTIONS,
                 "SQLALCHEMY_TRACK_MODIFICATIONS": False,
                 "TESTING": True,
             }
@@ -109,6 +139,32 @@ class TriviaTestCase(unittest.TestCase):
             self.assertEqual(res.status_code, 200)
             self.assertTrue(data["categories"])
 
+    def test_get_categories_served_from_registry(self):
+        registry = self.app.extensions["category_registry"]
+
+        self.client.get(self.api("/categories"))
+        misses = registry.stats()["misses"]
+        self.client.get(self.api("/categories"))
+        self.client.get(self.api("/questions"))
+
+        stats = registry.stats()
+        self.assertEqual(stats["misses"], misses)
+        self.assertGreaterEqual(stats["hits"], 2)
+
+    def test_get_categories_reflects_new_category(self):
+        self.client.get(self.api("/categories"))
+
+        with self.app.app_context():
+            category = Category(type="Music")
+            db.session.add(category)
+            db.session.commit()
+            category_id = category.id
+
+        res = self.client.get(self.api("/categories"))
+        data = res.get_json()
+
+        self.assertEqual(data["categories"][str(category_id)], "Music")
+
     def test_get_questions(self):
         EXPECTED_KEYS = {"id", "question", "answer", "category", "difficulty"}
         with self.app.app_context():
@@ -130,6 +186,552 @@ class TriviaTestCase(unittest.TestCase):
                     self.assertIsInstance(question, dict)
                     self.assertEqual(set(question.keys()), EXPECTED_KEYS)
 
+    def test_json_backends_return_same_payload(self):
+        stdlib_app = create_app(
+            {"SQLALCHEMY_DATABASE_URI": self.database_path, "JSON_BACKEND": "stdlib"}
+        )
+        self.assertEqual(stdlib_app.json.name, "stdlib")
+
+        for path in ("/questions", "/categories", "/categories/4/questions"):
+            fast = self.client.get(self.api(path))
+            slow = stdlib_app.test_client().get(self.api(path))
+            self.assertEqual(fast.mimetype, "application/json")
+            self.assertEqual(fast.get_json(), slow.get_json())
+
+        # Values Flask's provider falls back for encode the same way in both.
+        extras = {
+            "date": datetime.date(2024, 5, 1),
+            "decimal": decimal.Decimal("1.50"),
+            "uuid": uuid.UUID(int=1),
+        }
+        expected = {
+            "date": "Wed, 01 May 2024 00:00:00 GMT",
+            "decimal": "1.50",
+            "uuid": "00000000-0000-0000-0000-000000000001",
+        }
+        self.assertEqual(json.loads(stdlib_app.json.dumps(extras)), expected)
+        self.assertEqual(json.loads(self.app.json.dumps(extras)), expected)
+
+        # Both take jsonify()'s arguments the same way.
+        for app in (stdlib_app, self.app):
+            with app.app_context():
+                self.assertEqual(app.json.response(a=1).get_json(), {"a": 1})
+                self.assertEqual(app.json.response(1, 2).get_json(), [1, 2])
+                self.assertEqual(app.json.response([3]).get_json(), [3])
+                self.assertIsNone(app.json.response().get_json())
+                with self.assertRaises(TypeError):
+                    app.json.response(1, a=1)
+
+    def test_json_backend_rejects_unknown_name(self):
+        with self.assertRaises(ValueError):
+            create_app({"SQLALCHEMY_DATABASE_URI": self.database_path, "JSON_BACKEND": "xml"})
+
+        # The environment is read by the config class, not by create_app.
+        with mock.patch.dict(os.environ, {"JSON_BACKEND": "stdlib"}):
+            config = AppTestingConfig(testing=True).as_app_config()
+        self.assertEqual(config["JSON_BACKEND"], "stdlib")
+        with mock.patch.dict(os.environ, {"JSON_BACKEND": "xml"}):
+            create_app({"SQLALCHEMY_DATABASE_URI": self.database_path})
+
+    def test_read_path_skips_identity_map(self):
+        with self.app.app_context():
+            records = fetch_all(db.session, select_questions(Question.category == 4))
+            sampled = QuestionSampler(db.session).sample(4)
+
+            self.assertEqual(len(records), 4)
+            self.assertIsInstance(sampled, QuestionRecord)
+            self.assertEqual(len(db.session.identity_map), 0)
+            self.assertEqual(
+                self.app.json.loads(self.app.json.dumps(records[0])),
+                db.session.get(Question, records[0].id).format(),
+            )
+
+    def test_get_stats(self):
+        res = self.client.get(self.api("/stats"))
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data["success"])
+        self.assertEqual(data["total_questions"], 19)
+        self.assertEqual(data["by_category"]["4"], 4)
+        self.assertEqual(sum(data["by_difficulty"].values()), 19)
+        self.assertIn("hits", data["category_cache"])
+
+    def test_get_stats_reports_pool(self):
+        self.client.get(self.api("/questions"))
+        pool = self.client.get(self.api("/stats")).get_json()["pool"]
+
+        self.assertEqual(pool["class"], "InstrumentedQueuePool")
+        self.assertGreaterEqual(pool["checkouts"], 1)
+        self.assertEqual(pool["timeouts"], 0)
+        self.assertIn("wait_ms_max", pool)
+
+    def test_engine_options_from_environment(self):
+        env = {"DB_POOL_SIZE": "3", "DB_STATEMENT_TIMEOUT_MS": "1500"}
+        with mock.patch.dict(os.environ, env):
+            options = AppTestingConfig(testing=True).SQLALCHEMY_ENGINE_OPTIONS
+        app = create_app(
+            {"SQLALCHEMY_DATABASE_URI": self.database_path, "SQLALCHEMY_ENGINE_OPTIONS": options}
+        )
+
+        with app.app_context():
+            self.assertEqual(db.engine.pool.size(), 3)
+            self.assertEqual(db.session.execute(text("SHOW statement_timeout")).scalar(), "1500ms")
+
+        with mock.patch.dict(os.environ, {"DB_POOL_SIZE": "many"}):
+            with self.assertRaises(ValueError):
+                AppTestingConfig(testing=True).SQLALCHEMY_ENGINE_OPTIONS
+
+    def test_metrics_export(self):
+        self.client.get(self.api("/questions"))
+        self.client.delete(self.api("/questions/999999"))
+        res = self.client.get("/metrics")
+        body = res.get_data(as_text=True)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.content_type.startswith("text/plain; version=0.0.4"))
+        self.assertIn(
+            'trivia_http_requests_total{method="GET",route="/api/v1/questions",status="200"} 1',
+            body,
+        )
+        self.assertIn(
+            'method="DELETE",route="/api/v1/questions/<int:question_id>",status="404"', body
+        )
+        self.assertIn(
+            'trivia_http_request_duration_seconds_count{method="GET",route="/api/v1/questions"} 1',
+            body,
+        )
+        self.assertIn(
+            'trivia_http_request_db_queries_bucket{method="GET",route="/api/v1/questions",le="0"} 0',
+            body,
+        )
+        self.assertIn("trivia_http_requests_in_flight 0", body)
+        self.assertIn('trivia_db_pool_checkouts_total{pool="primary"}', body)
+
+    def query_log_app(self, **options):
+        return create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": self.database_path,
+                "QUERY_LOG_OPTIONS": options,
+            }
+        )
+
+    def test_query_budget_fails_in_test_mode(self):
+        app = self.query_log_app(budget_mode="raise", default_budget=1)
+        with self.app.app_context():
+            question_id = db.session.scalar(select(Question.id).limit(1))
+
+        with self.assertLogs(app.logger, "ERROR") as logs:
+            res = app.test_client().delete(self.api(f"/questions/{question_id}"))
+        self.assertEqual(res.status_code, 500)
+        error = logs.records[0].exc_info[1]
+        self.assertIsInstance(error, QueryBudgetExceeded)
+        self.assertIn(f"/questions/{question_id} issued 2 queries, budget 1", str(error))
+
+    def test_query_budget_warns(self):
+        client = self.query_log_app(budget_mode="warn", default_budget=0).test_client()
+
+        with self.assertLogs("flaskr.querylog", "WARNING") as logs:
+            res = client.delete(self.api("/questions/999999"))
+        self.assertEqual(res.status_code, 404)
+        self.assertIn("budget 0", logs.output[0])
+
+    def test_slow_query_log_with_plan(self):
+        client = self.query_log_app(slow_query_ms=0.001, explain=True).test_client()
+
+        with self.assertLogs("flaskr.querylog", "WARNING") as logs:
+            client.get(self.api("/questions"), query_string={"page": 2})
+        output = "\n".join(logs.output)
+        self.assertIn("Slow query", output)
+        self.assertIn("GET /api/v1/questions?page=2", output)
+        self.assertIn("Limit", output)
+
+    def replica_app(self, *replicas: str):
+        return create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": self.database_path,
+                "SQLALCHEMY_REPLICA_URIS": list(replicas),
+            }
+        )
+
+    def test_fast_startup(self):
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": self.database_path,
+                "STARTUP_OPTIONS": {
+                    "schema_check": "version",
+                    "pool_prewarm": 2,
+                    "prewarm_caches": True,
+                },
+            }
+        )
+        with app.app_context():
+            # The first start found no marker, created the schema and stamped it.
+            self.assertEqual(schema_version(db.engine), SCHEMA_VERSION)
+            self.assertFalse(ensure_schema("version"))
+            self.assertGreaterEqual(db.engine.pool.checkedin(), 2)
+            self.assertEqual(app.extensions[CATEGORY_REGISTRY_KEY].misses, 1)
+
+        body = app.test_client().get("/metrics").get_data(as_text=True)
+        for phase in ("config", "schema", "pool", "caches", "total"):
+            self.assertIn(f'trivia_startup_seconds{{phase="{phase}"}}', body)
+
+        with self.assertRaises(ValueError):
+            create_app(
+                {
+                    "SQLALCHEMY_DATABASE_URI": self.database_path,
+                    "STARTUP_OPTIONS": {"schema_check": "sometimes"},
+                }
+            )
+
+    def test_migrate_upgrades_existing_database(self):
+        # A database from before the marker and the category indexes.
+        with self.app.app_context():
+            db.session.execute(text("DROP INDEX ix_questions_category_id"))
+            db.session.execute(text("DROP INDEX ix_questions_category_difficulty"))
+            db.session.execute(text("DROP TABLE schema_version"))
+            db.session.execute(text("DROP TABLE quiz_sessions"))
+            db.session.commit()
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["migrate", "--list"])
+        self.assertIn("pending  Index questions by (category, id)", result.output)
+
+        # assertLogs also keeps pytest's live logging from resetting the
+        # runner's captured stdout.
+        with self.assertLogs("flaskr.migrations", "INFO") as logs:
+            result = runner.invoke(args=["migrate"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Applied 2:", result.output)
+        applied = [line for line in logs.output if "Applied migration" in line]
+        self.assertEqual(len(applied), SCHEMA_VERSION)
+        with self.app.app_context():
+            self.assertEqual(schema_version(db.engine), SCHEMA_VERSION)
+            self.assertTrue(inspect(db.engine).has_table("quiz_sessions"))
+            indexes = {index["name"] for index in inspect(db.engine).get_indexes("questions")}
+        self.assertLessEqual(
+            {"ix_questions_category_id", "ix_questions_category_difficulty"}, indexes
+        )
+        self.assertEqual(self.client.get(self.api("/stats")).get_json()["total_questions"], 19)
+
+        result = runner.invoke(args=["migrate"])
+        self.assertIn("nothing to apply", result.output)
+
+    def test_admission_sheds_expensive_load(self):
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": self.database_path,
+                "ADMISSION_OPTIONS": {
+                    "limits": {"expensive": 1},
+                    "queue_size": 1,
+                    "queue_timeout_ms": 300,
+                    "retry_after": 2,
+                },
+            }
+        )
+        client = app.test_client()
+        admission = app.extensions[ADMISSION_KEY]
+        quiz = {"quiz_category": 1, "previous_questions": []}
+
+        # Another quiz holds the only expensive slot past the queue timeout.
+        self.assertIsNone(admission.acquire("expensive"))
+        res = client.post(self.api("/quizzes"), json=quiz)
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.headers["Retry-After"], "2")
+        self.assertFalse(res.get_json()["success"])
+        self.assertEqual(client.get(self.api("/categories")).status_code, 200)
+
+        # A slot freed while the request waits is handed to it.
+        threading.Timer(0.05, admission.release, ("expensive",)).start()
+        self.assertEqual(client.post(self.api("/quizzes"), json=quiz).status_code, 200)
+
+        admission.classes["expensive"].queue_size = 0
+        self.assertIsNone(admission.acquire("expensive"))
+        self.assertEqual(client.post(self.api("/quizzes"), json=quiz).status_code, 503)
+        admission.release("expensive")
+
+        stats = client.get(self.api("/stats")).get_json()["admission"]["expensive"]
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["rejected"], {"queue_full": 1, "timeout": 1})
+        body = client.get("/metrics").get_data(as_text=True)
+        self.assertIn(
+            'trivia_admission_rejected_total{class="expensive",reason="timeout"} 1', body
+        )
+        self.assertIn('trivia_admission_admitted_total{class="cheap"} 2', body)
+
+    def test_compression_negotiates_encoding(self):
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": self.database_path,
+                "COMPRESSION_OPTIONS": {"min_size": 256, "cache_bytes": 1 << 20},
+            }
+        )
+        client = app.test_client()
+        decoders = {"gzip": gzip.decompress}
+        if compression.brotli is not None:
+            decoders["br"] = compression.brotli.decompress
+        if compression.zstandard is not None:
+            decoders["zstd"] = lambda body: (
+                compression.zstandard.ZstdDecompressor().decompressobj().decompress(body)
+            )
+        plain = client.get(self.api("/questions"))
+        self.assertNotIn("Content-Encoding", plain.headers)
+        self.assertIn("Accept-Encoding", plain.headers["Vary"])
+
+        for encoding, decode in decoders.items():
+            with self.subTest(encoding=encoding):
+                res = client.get(self.api("/questions"), headers={"Accept-Encoding": encoding})
+                self.assertEqual(res.headers["Content-Encoding"], encoding)
+                self.assertEqual(int(res.headers["Content-Length"]), len(res.data))
+                self.assertLess(len(res.data), len(plain.data))
+                self.assertEqual(decode(res.data), plain.data)
+
+        # q-values win over the server's preference; identity only is left alone.
+        res = client.get(
+            self.api("/questions"), headers={"Accept-Encoding": "zstd;q=0.1, br;q=0.1, gzip"}
+        )
+        self.assertEqual(res.headers["Content-Encoding"], "gzip")
+        res = client.get(self.api("/questions"), headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("Content-Encoding", res.headers)
+
+        # The compressed tag is weak and still revalidates.
+        res = client.get(self.api("/questions"), headers={"Accept-Encoding": "gzip"})
+        self.assertTrue(res.headers["ETag"].startswith('W/"'))
+        res = client.get(
+            self.api("/questions"),
+            headers={"Accept-Encoding": "gzip", "If-None-Match": res.headers["ETag"]},
+        )
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(
+            app.extensions[compression.EXTENSION_KEY].cache.stats()["hits"], 2
+        )
+
+        res = client.get(self.api("/categories"), headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", res.headers)
+
+    def test_compression_cache_is_keyed_by_url(self):
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": self.database_path,
+                "COMPRESSION_OPTIONS": {"min_size": 0, "cache_bytes": 1 << 20},
+            }
+        )
+        client = app.test_client()
+        gzip_only = {"Accept-Encoding": "gzip"}
+
+        # Even if two URLs ended up with the same tag, neither gets the other's body.
+        with mock.patch("flaskr.conditional._path_digest", return_value="0"):
+            first = client.get(self.api("/questions?page=1"), headers=gzip_only)
+            second = client.get(self.api("/questions?page=2"), headers=gzip_only)
+        self.assertEqual(first.headers["ETag"], second.headers["ETag"])
+        self.assertEqual(
+            gzip.decompress(second.data), client.get(self.api("/questions?page=2")).data
+        )
+
+    def test_compression_of_streamed_export(self):
+        plain = self.client.get(self.api("/questions/export?format=csv"))
+        res = self.client.get(
+            self.api("/questions/export?format=csv"), headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", res.headers)
+        self.assertEqual(gzip.decompress(res.data), plain.data)
+
+        stats = self.client.get(self.api("/stats")).get_json()["compression"]
+        self.assertEqual(stats["responses"]["gzip"], 1)
+        self.assertEqual(stats["bytes_in"], len(plain.data))
+        self.assertEqual(stats["bytes_out"], len(res.data))
+
+    def test_reads_go_to_replica(self):
+        app = self.replica_app(self.database_path)
+        client = app.test_client()
+
+        self.assertEqual(client.get(self.api("/questions")).status_code, 200)
+        self.assertEqual(client.get(self.api("/categories/4/questions")).status_code, 200)
+        reads = client.get(self.api("/stats")).get_json()["replicas"]["replicas"][0]["reads"]
+        self.assertGreaterEqual(reads, 2)
+
+        res = client.post(
+            self.api("/questions"),
+            json={"question": "Primary?", "answer": "Yes", "category": 4, "difficulty": 1},
+        )
+        self.assertEqual(res.status_code, 200)
+        stats = client.get(self.api("/stats")).get_json()["replicas"]
+        self.assertEqual(stats["replicas"][0]["reads"], reads + 1)
+
+    def test_read_after_write_uses_primary(self):
+        app = self.replica_app(self.database_path)
+        router = app.extensions["replica_router"]
+        stmt = select(Question.id)
+
+        def view():
+            self.assertIs(db.session.get_bind(clause=stmt), router.replicas[0].engine)
+            db.session.add(
+                Question(question="Fresh?", answer="Yes", category=4, difficulty=1)
+            )
+            db.session.flush()
+            self.assertIs(db.session.get_bind(clause=stmt), db.engine)
+            db.session.rollback()
+
+        with app.test_request_context():
+            read_only(view)()
+
+    def test_replica_down_falls_back_to_primary(self):
+        missing = make_url(self.database_path).set(database="trivia_test_missing")
+        app = self.replica_app(missing.render_as_string(hide_password=False))
+        client = app.test_client()
+
+        res = client.get(self.api("/questions"))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.get_json()["questions"]), 10)
+
+        stats = client.get(self.api("/stats")).get_json()["replicas"]
+        self.assertFalse(stats["replicas"][0]["healthy"])
+        self.assertGreaterEqual(stats["primary_fallbacks"], 1)
+
+    def test_counts_follow_writes(self):
+        res = self.client.post(
+            self.api("/questions"),
+            json={"question": "Counted?", "answer": "Yes", "category": 4, "difficulty": 5},
+        )
+        created = res.get_json()["created"]
+
+        data = self.client.get(self.api("/questions")).get_json()
+        self.assertEqual(data["total_questions"], 20)
+
+        self.client.put(self.api(f"/questions/{created}"), json={"category": 1})
+        data = self.client.get(self.api("/stats")).get_json()
+        self.assertEqual(data["by_category"]["4"], 4)
+        self.assertEqual(data["by_category"]["1"], 4)
+
+        self.client.delete(self.api(f"/questions/{created}"))
+        data = self.client.get(self.api("/categories/1/questions")).get_json()
+        self.assertEqual(data["total_questions"], 3)
+
+    def test_counts_follow_multi_row_writes(self):
+        with self.app.app_context():
+            ids = db.session.scalars(select(Question.id).where(Question.category == 4)).all()
+
+        self.client.patch(self.api("/questions"), json={"ids": ids, "changes": {"category": 1}})
+        data = self.client.get(self.api("/stats")).get_json()
+        self.assertNotIn("4", data["by_category"])
+        self.assertEqual(data["by_category"]["1"], 7)
+
+        self.client.delete(self.api("/questions"), json={"ids": ids})
+        data = self.client.get(self.api("/stats")).get_json()
+        self.assertEqual(data["total_questions"], 15)
+        self.assertEqual(data["by_category"]["1"], 3)
+
+    def test_generate_questions_command(self):
+        result = self.app.test_cli_runner().invoke(
+            args=[
+                "generate-questions",
+                "--count", "2500",
+                "--seed", "3",
+                "--categories", "History,Astronomy",
+                "--category-weights", "1,3",
+                "--chunk-size", "1000",
+            ]
+        )
+        self.assertIn("Generated 2500 questions", result.output)
+
+        data = self.client.get(self.api("/stats")).get_json()
+        self.assertEqual(data["total_questions"], 19 + 2500)
+        categories = self.client.get(self.api("/categories")).get_json()["categories"]
+        ids = {name: category_id for category_id, name in categories.items()}
+        # Astronomy is new; History already had 4 questions and gets a third as many.
+        self.assertGreater(
+            data["by_category"][ids["Astronomy"]], 2 * data["by_category"][ids["History"]]
+        )
+
+        result = self.app.test_cli_runner().invoke(
+            args=["generate-questions", "--count", "5", "--difficulty-weights", "1,2"]
+        )
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("5 difficulty weights", result.output)
+
+    def test_generated_rows_depend_only_on_seed(self):
+        spec = DatasetSpec()
+        first = list(generate_rows(spec, range(1, 7), 50, seed=11))
+
+        self.assertEqual(first, list(generate_rows(spec, range(1, 7), 50, seed=11)))
+        self.assertNotEqual(first, list(generate_rows(spec, range(1, 7), 50, seed=12)))
+        self.assertTrue(all(row["question"].endswith("?") for row in first))
+
+    def test_reconcile_counts_command_fixes_drift(self):
+        with self.app.app_context():
+            db.session.execute(text("UPDATE question_counts SET total = 0"))
+            db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=["reconcile-counts"])
+        self.assertIn("19 questions", result.output)
+
+        data = self.client.get(self.api("/questions")).get_json()
+        self.assertEqual(data["total_questions"], 19)
+
+    def test_if_modified_since_echoed_back_is_not_modified(self):
+        later = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=2)
+        with mock.patch("flaskr.conditional._utcnow", return_value=later):
+            res = self.client.get(self.api("/questions"))
+            last_modified = res.headers["Last-Modified"]
+            self.assertEqual(res.last_modified.microsecond, 0)
+
+            res = self.client.get(
+                self.api("/questions"), headers={"If-Modified-Since": last_modified}
+            )
+            self.assertEqual(res.status_code, 304)
+
+        # Until the rounded-up second has passed, no date is given out: a
+        # write later in it would otherwise share the date.
+        with self.app.app_context():
+            db.session.execute(text("UPDATE questions SET difficulty = difficulty WHERE id = 5"))
+            db.session.commit()
+            stamp = db.session.execute(
+                text("SELECT updated_at FROM data_versions WHERE name = 'questions'")
+            ).scalar_one()
+        with mock.patch("flaskr.conditional._utcnow", return_value=stamp):
+            res = self.client.get(self.api("/questions"))
+            self.assertNotIn("Last-Modified", res.headers)
+
+        res = self.client.get(
+            self.api("/questions"), headers={"If-Modified-Since": last_modified}
+        )
+        self.assertEqual(res.status_code, 200)
+
+    def test_get_questions_conditional_request(self):
+        res = self.client.get(self.api("/questions"))
+        etag = res.headers["ETag"]
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers["Cache-Control"], "no-cache")
+
+        res = self.client.get(self.api("/questions"), headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.data, b"")
+
+        res = self.client.get(
+            self.api("/questions"),
+            query_string={"page": 2},
+            headers={"If-None-Match": etag},
+        )
+        self.assertEqual(res.status_code, 200)
+
+        self.client.post(
+            self.api("/questions"),
+            json={"question": "Fresh?", "answer": "Yes", "category": 1, "difficulty": 1},
+        )
+        res = self.client.get(self.api("/questions"), headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers["ETag"], etag)
+
+    def test_get_categories_cache_control(self):
+        res = self.client.get(self.api("/categories"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers["Cache-Control"], "public, max-age=60")
+        self.assertIn("ETag", res.headers)
+
     def test_get_questions_invalid_page(self):
         res = self.client.get(self.api("/questions"), query_string={"page": 0})
         data = res.get_json()
@@ -138,6 +740,49 @@ class TriviaTestCase(unittest.TestCase):
         self.assertFalse(data["success"])
         self.assertIn("page must be >= 1", data["message"])
 
+    def test_get_questions_cursor_walks_every_question(self):
+        res = self.client.get(self.api("/questions"), query_string={"page": 1})
+        data = res.get_json()
+        self.assertEqual(data["pagination"], "page")
+        total = data["total_questions"]
+
+        ids = []
+        cursor = ""
+        while cursor is not None:
+            res = self.client.get(self.api("/questions"), query_string={"cursor": cursor})
+            data = res.get_json()
+
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(data["pagination"], "cursor")
+            self.assertLessEqual(len(data["questions"]), 10)
+            ids.extend(q["id"] for q in data["questions"])
+            cursor = data["next_cursor"]
+
+        self.assertEqual(len(ids), total)
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_get_questions_invalid_cursor(self):
+        res = self.client.get(self.api("/questions"), query_string={"cursor": "bogus"})
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data["success"])
+        self.assertIn("cursor", data["message"])
+
+    def test_cursor_with_non_integer_values_is_rejected(self):
+        for values in (["x"], [[1]], [{"a": 1}], [None], [True], [1, 2]):
+            cursor = encode_cursor("id", values)
+            with self.subTest(values=values):
+                res = self.client.get(self.api("/questions"), query_string={"cursor": cursor})
+                self.assertEqual(res.status_code, 400)
+                self.assertIn("cursor", res.get_json()["message"])
+                res = self.client.post(
+                    self.api("/questions/search"),
+                    json={"searchTerm": "the"},
+                    query_string={"cursor": cursor},
+                )
+                self.assertEqual(res.status_code, 400)
+
     def test_delete_question(self):
         with self.app.app_context():
             category = Category(type="Test Category")
@@ -228,6 +873,150 @@ class TriviaTestCase(unittest.TestCase):
         self.assertFalse(data["success"])
         self.assertIn("difficulty must be an integer between 1 and 5", data["message"])
 
+    def test_bulk_import_json_array(self):
+        items = [
+            {"question": "Bulk one?", "answer": "One", "category": 1, "difficulty": 1},
+            {"question": "", "answer": "Two", "category": 1, "difficulty": 1},
+            {"question": "Bulk three?", "answer": "Three", "category": 999, "difficulty": 1},
+            {"question": "Bulk four?", "answer": "Four", "category": 2, "difficulty": 5},
+        ]
+
+        res = self.client.post(self.api("/questions/bulk"), json=items)
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data["created"], 2)
+        self.assertEqual(data["failed"], 2)
+        self.assertEqual([e["index"] for e in data["errors"]], [1, 2])
+
+        data = self.client.get(self.api("/stats")).get_json()
+        self.assertEqual(data["total_questions"], 21)
+
+        res = self.client.post(self.api("/questions/search"), json={"searchTerm": "bulk"})
+        self.assertEqual(res.get_json()["total_questions"], 2)
+
+    def test_bulk_import_ndjson(self):
+        lines = [
+            '{"question": "Line one?", "answer": "A", "category": 3, "difficulty": 2}',
+            "not json",
+            '{"question": "Line, \\"three\\"?", "answer": "B\\nC", "category": 3, "difficulty": 2}',
+        ]
+
+        res = self.client.post(
+            self.api("/questions/bulk"),
+            data="\n".join(lines),
+            content_type="application/x-ndjson",
+        )
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data["created"], 2)
+        self.assertEqual(data["errors"], [{"index": 1, "message": "Line is not valid JSON."}])
+
+        with self.app.app_context():
+            stored = db.session.query(Question).filter_by(answer="B\nC").one()
+            self.assertEqual(stored.question, 'Line, "three"?')
+
+    def test_bulk_import_rejects_non_array(self):
+        res = self.client.post(self.api("/questions/bulk"), json={"question": "x"})
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("JSON array or NDJSON", data["message"])
+
+    def test_export_ndjson(self):
+        res = self.client.get(self.api("/questions/export"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.mimetype, "application/x-ndjson")
+        rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(rows), 19)
+        self.assertEqual([r["id"] for r in rows], sorted(r["id"] for r in rows))
+        self.assertEqual(
+            set(rows[0].keys()), {"id", "question", "answer", "category", "difficulty"}
+        )
+
+    def test_export_csv_filtered(self):
+        res = self.client.get(
+            self.api("/questions/export"), query_string={"format": "csv", "category": 4}
+        )
+
+        self.assertEqual(res.status_code, 200)
+        rows = list(csv.reader(io.StringIO(res.get_data(as_text=True))))
+        self.assertEqual(rows[0], ["id", "question", "answer", "category", "difficulty"])
+        self.assertEqual([int(r[0]) for r in rows[1:]], [5, 9, 12, 23])
+
+    def test_export_fails_loudly_on_database_error(self):
+        def broken_rows(_engine, _conditions):
+            yield [(1, "Partial?", "Yes", 1, 1)]
+            raise OperationalError("SELECT", {}, Exception("connection lost"))
+
+        # The error reaches the server, which drops the connection, rather
+        # than ending the body as if the export were complete.
+        with mock.patch("flaskr.bulk.export_rows", broken_rows), self.assertLogs(
+            self.app.logger, "ERROR"
+        ), self.assertRaises(OperationalError):
+            self.client.get(self.api("/questions/export")).get_data()
+
+    def test_export_invalid_format(self):
+        res = self.client.get(self.api("/questions/export"), query_string={"format": "xml"})
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("format must be one of", res.get_json()["message"])
+
+    def test_batch_delete_by_ids(self):
+        res = self.client.delete(self.api("/questions"), json={"ids": [5, 9, 999999]})
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data["deleted"], 2)
+
+        with self.app.app_context():
+            self.assertIsNone(db.session.get(Question, 5))
+            self.assertIsNone(db.session.get(Question, 9))
+
+    def test_batch_delete_by_filter(self):
+        res = self.client.delete(
+            self.api("/questions"), json={"filter": {"category": 4, "difficulty": 2}}
+        )
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data["deleted"], 2)
+
+        data = self.client.get(self.api("/categories/4/questions")).get_json()
+        self.assertEqual(sorted(q["id"] for q in data["questions"]), [9, 23])
+        self.assertEqual(data["total_questions"], 2)
+
+    def test_batch_delete_requires_ids_or_filter(self):
+        res = self.client.delete(self.api("/questions"), json={})
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("exactly one of ids or filter", data["message"])
+
+    def test_batch_update(self):
+        res = self.client.patch(
+            self.api("/questions"), json={"ids": [5, 9], "changes": {"difficulty": 5}}
+        )
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data["updated"], 2)
+
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Question, 5).difficulty, 5)  # type: ignore
+            self.assertEqual(db.session.get(Question, 9).difficulty, 5)  # type: ignore
+
+    def test_batch_update_invalid_changes(self):
+        res = self.client.patch(
+            self.api("/questions"), json={"ids": [5], "changes": {"category": 999}}
+        )
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 422)
+        self.assertIn("does not exist", data["message"])
+
     def test_search_questions_by_term(self):
         payload = {"searchTerm": "title"}
 
@@ -242,6 +1031,126 @@ class TriviaTestCase(unittest.TestCase):
         for question in data["questions"]:
             self.assertIn("title", question["question"].lower())
 
+    def test_search_questions_in_answers(self):
+        payload = {"searchTerm": "lake victoria"}
+
+        res = self.client.post(self.api("/questions/search"), json=payload)
+        self.assertEqual(res.get_json()["questions"], [])
+
+        payload["searchAnswers"] = True
+        res = self.client.post(self.api("/questions/search"), json=payload)
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([q["id"] for q in data["questions"]], [13])
+
+    def test_search_questions_sees_new_and_deleted_questions(self):
+        payload = {"searchTerm": "zanzibar"}
+        res = self.client.post(self.api("/questions/search"), json=payload)
+        self.assertEqual(res.get_json()["total_questions"], 0)
+
+        res = self.client.post(
+            self.api("/questions"),
+            json={
+                "question": "Which island is home to Stone Town, Zanzibar?",
+                "answer": "Unguja",
+                "category": 3,
+                "difficulty": 3,
+            },
+        )
+        created = res.get_json()["created"]
+
+        res = self.client.post(self.api("/questions/search"), json=payload)
+        self.assertEqual([q["id"] for q in res.get_json()["questions"]], [created])
+
+        self.client.delete(self.api(f"/questions/{created}"))
+        res = self.client.post(self.api("/questions/search"), json=payload)
+        self.assertEqual(res.get_json()["total_questions"], 0)
+
+    def test_search_sees_other_workers_writes(self):
+        other_worker = create_app({"SQLALCHEMY_DATABASE_URI": self.database_path})
+        other = other_worker.test_client()
+        payload = {"searchTerm": "zebraquux"}
+        res = other.post(self.api("/questions/search"), json=payload)
+        self.assertEqual(res.get_json()["total_questions"], 0)
+
+        self.client.post(
+            self.api("/questions"),
+            json={"question": "zebraquux?", "answer": "Yes", "category": 1, "difficulty": 1},
+        )
+        res = other.post(self.api("/questions/search"), json=payload)
+        self.assertEqual(res.get_json()["total_questions"], 1)
+
+    def test_search_backend_does_not_build_indexes_at_startup(self):
+        with self.app.app_context():
+            for name, _ in TRIGRAM_INDEXES:
+                db.session.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            db.session.commit()
+
+        app = create_app({"SQLALCHEMY_DATABASE_URI": self.database_path})
+        with app.app_context():
+            indexes = {index["name"] for index in inspect(db.engine).get_indexes("questions")}
+            self.assertEqual(create_search_backend(db.engine).name, "ilike")
+        self.assertFalse(indexes & {name for name, _ in TRIGRAM_INDEXES})
+
+    def test_search_questions_treats_wildcards_literally(self):
+        res = self.client.post(self.api("/questions/search"), json={"searchTerm": "%"})
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data["questions"], [])
+
+    def test_search_questions_paginated(self):
+        payload = {"searchTerm": "the"}
+
+        res = self.client.post(
+            self.api("/questions/search"), json=payload, query_string={"limit": 2}
+        )
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(data["questions"]), 2)
+        self.assertGreater(data["total_questions"], 2)
+        total = data["total_questions"]
+
+        # Page mode hands out the last row's cursor too, and none on the last page.
+        self.assertEqual(data["pagination"], "page")
+        self.assertEqual(data["next_cursor"], encode_cursor("id", [data["questions"][-1]["id"]]))
+        last_page = -(-total // 2)
+        res = self.client.post(
+            self.api("/questions/search"),
+            json=payload,
+            query_string={"limit": 2, "page": last_page},
+        )
+        self.assertIsNone(res.get_json()["next_cursor"])
+
+        ids = []
+        cursor = ""
+        while cursor is not None:
+            res = self.client.post(
+                self.api("/questions/search"),
+                json=payload,
+                query_string={"limit": 2, "cursor": cursor},
+            )
+            data = res.get_json()
+            self.assertEqual(data["pagination"], "cursor")
+            ids.extend(q["id"] for q in data["questions"])
+            cursor = data["next_cursor"]
+
+        self.assertEqual(len(ids), total)
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_search_questions_rejects_oversized_limit(self):
+        res = self.client.post(
+            self.api("/questions/search"),
+            json={"searchTerm": "the"},
+            query_string={"limit": 1000},
+        )
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("limit must be between", data["message"])
+
     def test_search_questions_missing_term(self):
         res = self.client.post(self.api("/questions/search"), json={})
         data = res.get_json()
@@ -264,6 +1173,17 @@ class TriviaTestCase(unittest.TestCase):
         for q in data["questions"]:
             self.assertEqual(q["category"], category_id)
 
+    def test_get_questions_by_category_paginated(self):
+        res = self.client.get(
+            self.api("/categories/4/questions"), query_string={"page": 2, "limit": 2}
+        )
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([q["id"] for q in data["questions"]], [12, 23])
+        self.assertEqual(data["total_questions"], 4)
+        self.assertEqual(data["pagination"], "page")
+
     def test_get_questions_by_category_not_found(self):
         res = self.client.get(self.api("/categories/999999/questions"))
         data = res.get_json()
@@ -323,6 +1243,181 @@ class TriviaTestCase(unittest.TestCase):
         self.assertTrue(data["question"])
         self.assertEqual(str(data["question"]["category"]), category_id)
 
+    def test_quizzes_returns_last_remaining_question(self):
+        payload = {"previous_questions": [5, 9, 23], "quiz_category": "4"}
+
+        for _ in range(5):
+            res = self.client.post(self.api("/quizzes"), json=payload)
+            data = res.get_json()
+
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(data["question"]["id"], 12)
+
+    def test_quizzes_returns_null_when_category_exhausted(self):
+        payload = {"previous_questions": [5, 9, 12, 23], "quiz_category": "4"}
+
+        res = self.client.post(self.api("/quizzes"), json=payload)
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIsNone(data["question"])
+
+    def test_quizzes_returns_batch(self):
+        payload = {"previous_questions": [9], "quiz_category": "4", "count": 3}
+
+        res = self.client.post(self.api("/quizzes"), json=payload)
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(sorted(q["id"] for q in data["questions"]), [5, 12, 23])
+
+        # Fewer left than asked for: the rest, then an empty list.
+        payload["count"] = 10
+        res = self.client.post(self.api("/quizzes"), json=payload)
+        self.assertEqual(sorted(q["id"] for q in res.get_json()["questions"]), [5, 12, 23])
+        payload["previous_questions"] = [5, 9, 12, 23]
+        res = self.client.post(self.api("/quizzes"), json=payload)
+        self.assertEqual(res.get_json(), {"questions": []})
+
+    def test_quizzes_batch_is_reproducible_with_seed(self):
+        previous = [1, 4, 20]
+        payload = {"previous_questions": previous, "quiz_category": 0, "count": 8, "seed": 42}
+
+        first = self.client.post(self.api("/quizzes"), json=payload).get_json()["questions"]
+        again = self.client.post(self.api("/quizzes"), json=payload).get_json()["questions"]
+        ids = [q["id"] for q in first]
+
+        self.assertEqual(first, again)
+        self.assertEqual(len(ids), 8)
+        self.assertEqual(len(set(ids)), 8)
+        self.assertFalse(set(ids) & set(previous))
+
+        # Excluded ids that are not in the table do not shrink the draw.
+        with self.app.app_context():
+            sampler = QuestionSampler(db.session)
+            exclude = set(range(1000, 1300)) | set(ids)
+            rest = [q.id for q in sampler.sample_many(0, 19, exclude=exclude)]
+        self.assertEqual(len(rest), 19 - 8)
+        self.assertFalse(set(rest) & exclude)
+
+    def test_quiz_sampling_is_uniform(self):
+        # History holds ids 5, 9, 12 and 23: a pivot-and-seek draw would pick
+        # 23, after the widest gap, far more often than 5.
+        with self.app.app_context():
+            sampler = QuestionSampler(db.session, rng=random.Random(7))
+            singles = Counter(sampler.sample(4).id for _ in range(400))
+            batched = Counter(
+                q.id for _ in range(400) for q in sampler.sample_many(4, 2, exclude=[9])
+            )
+
+        self.assertEqual(set(singles), {5, 9, 12, 23})
+        for qid, n in singles.items():
+            self.assertTrue(60 <= n <= 140, (qid, n))
+        self.assertEqual(set(batched), {5, 12, 23})
+        for qid, n in batched.items():
+            self.assertTrue(220 <= n <= 313, (qid, n))
+
+    def test_quizzes_rejects_invalid_count_and_seed(self):
+        for field, value in (("count", 0), ("count", 51), ("count", True), ("seed", "7")):
+            payload = {"previous_questions": [], "quiz_category": 0, field: value}
+            res = self.client.post(self.api("/quizzes"), json=payload)
+            self.assertEqual(res.status_code, 400, (field, value))
+            self.assertIn(field, res.get_json()["message"])
+
+    def test_quiz_session_serves_each_question_once(self):
+        res = self.client.post(self.api("/quizzes/sessions"), json={"quiz_category": "4"})
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data["success"])
+        token = data["session_token"]
+
+        seen = []
+        for _ in range(4):
+            res = self.client.post(self.api(f"/quizzes/sessions/{token}/next"))
+            data = res.get_json()
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(data["question"]["category"], 4)
+            seen.append(data["question"]["id"])
+
+        self.assertEqual(sorted(seen), [5, 9, 12, 23])
+        self.assertEqual(data["questions_seen"], 4)
+
+        res = self.client.post(self.api(f"/quizzes/sessions/{token}/next"))
+        self.assertIsNone(res.get_json()["question"])
+
+        res = self.client.delete(self.api(f"/quizzes/sessions/{token}"))
+        self.assertEqual(res.status_code, 200)
+
+        res = self.client.post(self.api(f"/quizzes/sessions/{token}/next"))
+        self.assertEqual(res.status_code, 404)
+
+    def test_quiz_session_works_across_workers(self):
+        other_worker = create_app({"SQLALCHEMY_DATABASE_URI": self.database_path})
+        other = other_worker.test_client()
+        res = self.client.post(self.api("/quizzes/sessions"), json={"quiz_category": "4"})
+        token = res.get_json()["session_token"]
+
+        seen = []
+        for client in (self.client, other, self.client, other):
+            res = client.post(self.api(f"/quizzes/sessions/{token}/next"))
+            self.assertEqual(res.status_code, 200)
+            seen.append(res.get_json()["question"]["id"])
+        self.assertEqual(sorted(seen), [5, 9, 12, 23])
+        res = other.post(self.api(f"/quizzes/sessions/{token}/next"))
+        self.assertIsNone(res.get_json()["question"])
+
+        self.assertEqual(other.delete(self.api(f"/quizzes/sessions/{token}")).status_code, 200)
+        res = self.client.post(self.api(f"/quizzes/sessions/{token}/next"))
+        self.assertEqual(res.status_code, 404)
+
+    def test_concurrent_quiz_session_steps_do_not_repeat(self):
+        res = self.client.post(self.api("/quizzes/sessions"), json={"quiz_category": 0})
+        token = res.get_json()["session_token"]
+        workers = [
+            create_app({"SQLALCHEMY_DATABASE_URI": self.database_path}).test_client()
+            for _ in range(4)
+        ]
+        start = threading.Barrier(len(workers))
+        served = []
+
+        def play(client) -> None:
+            start.wait()
+            for _ in range(4):
+                res = client.post(self.api(f"/quizzes/sessions/{token}/next"))
+                served.append(res.get_json()["question"]["id"])
+
+        threads = [threading.Thread(target=play, args=(client,)) for client in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Without the row lock, two steps could read the same seen set, serve
+        # the same question, or overwrite each other's additions.
+        self.assertEqual(len(served), 16)
+        self.assertEqual(len(set(served)), 16)
+        res = self.client.post(self.api(f"/quizzes/sessions/{token}/next"))
+        self.assertEqual(res.get_json()["questions_seen"], 17)
+
+    def test_seen_set_round_trips_through_bytes(self):
+        seen = SeenSet()
+        for question_id in (0, 5, 1023, 1024, 987_654_321):
+            seen.add(question_id)
+        restored = SeenSet.from_bytes(seen.to_bytes())
+        self.assertEqual(list(restored), [0, 5, 1023, 1024, 987_654_321])
+        self.assertEqual(len(restored), 5)
+        self.assertEqual(len(SeenSet.from_bytes(SeenSet().to_bytes())), 0)
+
+    def test_quiz_session_unknown_category(self):
+        res = self.client.post(
+            self.api("/quizzes/sessions"), json={"quiz_category": 999999}
+        )
+        data = res.get_json()
+
+        self.assertEqual(res.status_code, 404)
+        self.assertFalse(data["success"])
+
     def test_update_question_put(self):
         with self.app.app_context():
             category = Category(type="Update Category")